@@ -0,0 +1,83 @@
+"""问题解析微基准：逐元素 query_selector/inner_text 与单次 eval_on_selector_all 对比
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_extract
+"""
+
+import asyncio
+import os
+import time
+
+from playwright.async_api import async_playwright, Page
+
+from src.crawler import (
+    QUESTION_CONTENT_SELECTOR,
+    QUESTION_ITEM_SELECTOR,
+    extract_questions,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "question_list.html")
+SIZES = (50, 200, 1000)
+ROUNDS = 5
+
+
+async def load_fixture(page: Page, size: int) -> None:
+    """加载夹具页面，并把其中的问题项复制到指定数量"""
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        html = f.read()
+    await page.set_content(html)
+    await page.evaluate(
+        """(size) => {
+            const list = document.querySelector(".question-list");
+            const template = list.querySelector(".question-item");
+            for (let i = 1; i < size; i++) {
+                const item = template.cloneNode(true);
+                item.dataset.questionId = String(1000001 + i);
+                item.querySelector(".question-content").textContent += ` #${i}`;
+                list.appendChild(item);
+            }
+        }""",
+        size,
+    )
+
+
+async def legacy_extract(page: Page) -> list[str]:
+    """原实现：每个问题项单独 query_selector + inner_text（2N+1 次往返）"""
+    texts = []
+    for element in await page.query_selector_all(QUESTION_ITEM_SELECTOR):
+        content_div = await element.query_selector(QUESTION_CONTENT_SELECTOR)
+        if content_div:
+            texts.append((await content_div.inner_text()).strip())
+    return texts
+
+
+async def measure(func, page: Page) -> float:
+    """返回多轮执行中的最短耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await func(page)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main():
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        print(f"{'问题数':>8} {'逐元素(ms)':>12} {'单次调用(ms)':>14} {'加速比':>8}")
+        for size in SIZES:
+            await load_fixture(page, size)
+            legacy = await legacy_extract(page)
+            bulk = await extract_questions(page)
+            assert len(legacy) == len(bulk) == size
+            legacy_ms = await measure(legacy_extract, page)
+            bulk_ms = await measure(extract_questions, page)
+            print(
+                f"{size:>8} {legacy_ms:>12.1f} {bulk_ms:>14.1f} {legacy_ms / bulk_ms:>7.1f}x"
+            )
+        await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""本地资料检索微基准：索引构建、增量更新、重启载入与查询耗时
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_retrieval --files 200 --paragraphs 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_similar import _CHARS
+from src.retrieval import CorpusIndex
+
+
+def random_sentence(rng: random.Random) -> str:
+    return "".join(rng.choice(_CHARS) for _ in range(rng.randint(10, 40))) + "。"
+
+
+def write_corpus(corpus_dir: str, files: int, paragraphs: int, rng: random.Random) -> list[str]:
+    """生成随机资料，返回所有句子（用于构造查询）"""
+    sentences = []
+    for i in range(files):
+        lines = []
+        for _ in range(paragraphs):
+            paragraph = [random_sentence(rng) for _ in range(rng.randint(1, 4))]
+            sentences.extend(paragraph)
+            lines.append("".join(paragraph))
+        with open(os.path.join(corpus_dir, f"chapter-{i:04d}.md"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(lines))
+    return sentences
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地资料检索微基准")
+    parser.add_argument("--files", type=int, default=200, help="资料文件数量")
+    parser.add_argument("--paragraphs", type=int, default=50, help="每个文件的段落数")
+    parser.add_argument("--queries", type=int, default=2000, help="查询次数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory(prefix="autoanswer-retrieval-") as work_dir:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        index_dir = os.path.join(work_dir, "index")
+        os.makedirs(corpus_dir)
+        sentences = write_corpus(corpus_dir, args.files, args.paragraphs, rng)
+
+        index = CorpusIndex(corpus_dir, index_dir)
+        start = time.perf_counter()
+        passages = index.update()
+        build_s = time.perf_counter() - start
+
+        # 修改一个文件后增量更新，只重建该文件
+        with open(os.path.join(corpus_dir, "chapter-0000.md"), "a", encoding="utf-8") as f:
+            f.write("\n\n" + random_sentence(rng))
+        start = time.perf_counter()
+        index.update()
+        update_s = time.perf_counter() - start
+        index.close()
+
+        start = time.perf_counter()
+        index = CorpusIndex(corpus_dir, index_dir)
+        index.load()
+        load_s = time.perf_counter() - start
+
+        # 一半查询取自资料原句的片段，一半是随机文本
+        queries = [
+            rng.choice(sentences)[:12] if i % 2 == 0 else random_sentence(rng)[:12]
+            for i in range(args.queries)
+        ]
+        timings = []
+        confident = 0
+        for query in queries:
+            start = time.perf_counter()
+            hits = index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+            confident += bool(hits) and hits[0][1] >= 0.6
+        docs = index.docs
+        index.close()
+
+    timings.sort()
+    print(f"构建索引: {args.files} 个文件 / {passages} 个段落, {build_s:.2f}s")
+    print(f"增量更新 1 个文件: {update_s * 1000:.1f} ms")
+    print(f"重启载入: {load_s * 1000:.1f} ms ({docs} 个段落)")
+    print(
+        f"查询 {args.queries} 次: p50 {statistics.median(timings):.3f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms, 置信度 >= 0.6: {confident} 次"
+    )
+
+
+if __name__ == "__main__":
+    main()
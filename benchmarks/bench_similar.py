@@ -0,0 +1,80 @@
+"""相似问题索引微基准：写入与查询耗时、重启载入耗时
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_similar --entries 20000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from src.similar import SimilarQuestionIndex
+
+# 生成问题用的常用字
+_CHARS = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下"
+    "过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都"
+    "两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重"
+)
+
+
+def random_question(rng: random.Random) -> str:
+    return "".join(rng.choice(_CHARS) for _ in range(rng.randint(8, 30))) + "？"
+
+
+def mutate(question: str, rng: random.Random) -> str:
+    """替换一两个字并去掉问号，模拟措辞略有不同的重复问题"""
+    chars = list(question.rstrip("？"))
+    for _ in range(rng.randint(1, 2)):
+        chars[rng.randrange(len(chars))] = rng.choice(_CHARS)
+    return "".join(chars)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="相似问题索引微基准")
+    parser.add_argument("--entries", type=int, default=20000, help="索引中的问题数量")
+    parser.add_argument("--queries", type=int, default=2000, help="查询次数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    questions = [random_question(rng) for _ in range(args.entries)]
+    with tempfile.TemporaryDirectory(prefix="autoanswer-similar-") as work_dir:
+        path = os.path.join(work_dir, "similar.db")
+        index = SimilarQuestionIndex(path, max_entries=args.entries)
+        start = time.perf_counter()
+        for question in questions:
+            index.add(question, "回答")
+        add_s = time.perf_counter() - start
+
+        # 一半查询是已有问题的变体，一半是新问题
+        queries = [
+            mutate(rng.choice(questions), rng) if i % 2 == 0 else random_question(rng)
+            for i in range(args.queries)
+        ]
+        timings = []
+        hits = 0
+        for query in queries:
+            start = time.perf_counter()
+            hits += index.lookup(query) is not None
+            timings.append((time.perf_counter() - start) * 1000)
+        index.close()
+
+        start = time.perf_counter()
+        reloaded = SimilarQuestionIndex(path, max_entries=args.entries)
+        load_s = time.perf_counter() - start
+        reloaded.close()
+
+    timings.sort()
+    print(f"写入 {args.entries} 条: {add_s:.2f}s ({add_s / args.entries * 1000:.3f} ms/条)")
+    print(
+        f"查询 {args.queries} 次: p50 {statistics.median(timings):.3f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms, 复用 {hits} 次"
+    )
+    print(f"重启载入: {load_s:.2f}s ({reloaded.size} 条)")
+
+
+if __name__ == "__main__":
+    main()
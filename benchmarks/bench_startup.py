@@ -0,0 +1,77 @@
+"""启动耗时基准：在独立进程中用 python -X importtime 导入入口模块
+
+输出多次运行的导入总耗时（中位数），以及累计耗时最高的模块，
+并检查 openai / playwright 是否在启动阶段就被导入。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --module src.answer --runs 10 --top 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# 启动阶段不应导入的重量级依赖
+HEAVY_MODULES = ("openai", "playwright")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument("--module", default="main", help="要导入的模块")
+    parser.add_argument("--runs", type=int, default=5, help="重复运行次数")
+    parser.add_argument("--top", type=int, default=15, help="显示累计耗时最高的模块数")
+    return parser.parse_args()
+
+
+def import_once(module: str) -> tuple[dict[str, int], list[str]]:
+    """在新进程中导入模块
+    Returns:
+        tuple: (模块名 -> 累计导入耗时(微秒), 已导入的重量级依赖)
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print('HEAVY=' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if not cum.strip().isdigit():
+            continue
+        cumulative[name.strip()] = int(cum)
+    # 项目日志也会输出到 stdout，只取带标记的一行
+    marker = next(line for line in result.stdout.splitlines() if line.startswith("HEAVY="))
+    heavy = [m for m in marker[len("HEAVY=") :].split(",") if m]
+    return cumulative, heavy
+
+
+def main() -> None:
+    args = parse_args()
+    import_once(args.module)  # 预热：生成字节码缓存
+    runs = [import_once(args.module) for _ in range(args.runs)]
+    totals = [run[0].get(args.module, 0) / 1e6 for run in runs]
+    last, heavy = runs[-1]
+
+    print(f"导入 {args.module}: 中位数 {statistics.median(totals):.3f}s "
+          f"(最小 {min(totals):.3f}s, 最大 {max(totals):.3f}s, {args.runs} 次)")
+    print(f"启动时已导入的重量级依赖: {', '.join(heavy) or '无'}")
+    print()
+    print(f"{'模块':<48}{'累计(ms)':>10}")
+    ranked = sorted(last.items(), key=lambda item: item[1], reverse=True)
+    for name, cum in ranked[: args.top]:
+        print(f"{name:<50}{cum / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
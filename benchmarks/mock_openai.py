@@ -0,0 +1,237 @@
+"""本地模拟 OpenAI 兼容接口：/v1/chat/completions
+
+可配置响应延迟，并在回答前输出一段 <think>…</think> 推理内容，模拟推理模型
+（也可以省略 <think> 开始标签，模拟只输出 </think> 的模型）。
+支持 stream=True（SSE 分块输出），客户端提前断开时停止生成。
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 回答之后的附加内容，用于检验空行提前结束
+_ANSWER = "1. 先理解基本概念\n2. 结合例子多练习"
+_TAIL = "\n\n希望我的回答对你有所帮助，如果还有其他问题欢迎继续交流。"
+# 批量请求中的编号问题行
+_BATCH_ITEM = re.compile(r"^(\d+)\. 问题：", re.MULTILINE)
+# 推理内容由该字符重复组成，回答中出现即说明推理内容被当成了回答
+THINK_CHAR = "嗯"
+
+
+class MockOpenAI:
+    """模拟的聊天补全服务
+
+    Args:
+        latency_s: 每次请求的基础延迟（首个 token 之前，秒）
+        jitter_s: 在基础延迟上叠加的随机抖动上限（秒）
+        think_chars: <think> 推理内容的字符数，0 表示不输出推理
+        token_latency_s: 每个输出分块（约一个 token）的生成耗时（秒）
+        chunk_chars: 每个输出分块的字符数
+        reasoning_field: 推理内容放在 delta.reasoning_content 而不是 <think> 中
+        think_open_tag: 为 False 时省略 <think> 开始标签，只在推理内容之后输出 </think>
+        fail_rate: 随机返回 503 错误的比例（0-1），用于检验重试与熔断
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 1.0,
+        jitter_s: float = 0.0,
+        think_chars: int = 300,
+        token_latency_s: float = 0.0,
+        chunk_chars: int = 2,
+        reasoning_field: bool = False,
+        think_open_tag: bool = True,
+        fail_rate: float = 0.0,
+    ):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.think_chars = think_chars
+        self.token_latency_s = token_latency_s
+        self.chunk_chars = max(1, chunk_chars)
+        self.reasoning_field = reasoning_field
+        self.think_open_tag = think_open_tag
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.chunks_sent = 0  # 实际输出的分块数（近似 completion token 数）
+        self.connections = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def answer_text(self, question: str) -> str:
+        """回答正文；批量请求按编号返回 JSON 对象"""
+        ids = _BATCH_ITEM.findall(question)
+        if ids and "JSON" in question:
+            return json.dumps({i: _ANSWER for i in ids}, ensure_ascii=False)
+        return _ANSWER + _TAIL
+
+    def completion_text(self, question: str) -> str:
+        open_tag = "<think>" if self.think_open_tag else ""
+        think = (
+            f"{open_tag}{THINK_CHAR * self.think_chars}</think>\n" if self.think_chars else ""
+        )
+        return f"{think}{self.answer_text(question)}"
+
+    def completion_chunks(self, question: str) -> list[tuple[str, str]]:
+        """流式输出的分块列表：(字段名, 文本)"""
+        if self.reasoning_field:
+            parts = [
+                ("reasoning_content", THINK_CHAR * self.think_chars),
+                ("content", self.answer_text(question)),
+            ]
+        else:
+            parts = [("content", self.completion_text(question))]
+        size = self.chunk_chars
+        return [
+            (field, text[i : i + size])
+            for field, text in parts
+            for i in range(0, len(text), size)
+        ]
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def start(self) -> "MockOpenAI":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1：支持长连接和分块传输
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # 静默访问日志
+                pass
+
+            def setup(self):
+                super().setup()
+                mock._count("connections")
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 客户端提前结束流式请求后断开连接
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                mock._count("requests")
+                time.sleep(mock.latency_s + random.uniform(0, mock.jitter_s))
+                if random.random() < mock.fail_rate:
+                    mock._count("failures")
+                    data = b'{"error": {"message": "mock overloaded", "type": "server_error"}}'
+                    self.send_response(503)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                question = body["messages"][-1]["content"]
+                if body.get("stream"):
+                    self._stream(body, question)
+                else:
+                    self._complete(body, question)
+
+            def _complete(self, body: dict, question: str) -> None:
+                chunks = mock.completion_chunks(question)
+                time.sleep(mock.token_latency_s * len(chunks))
+                mock._count("chunks_sent", len(chunks))
+                content = mock.completion_text(question)
+                payload = {
+                    "id": f"chatcmpl-mock-{mock.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": len(question),
+                        "completion_tokens": len(chunks),
+                        "total_tokens": len(question) + len(chunks),
+                    },
+                }
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _event(self, body: dict, delta: dict, finish_reason: str | None) -> bytes:
+                payload = {
+                    "id": "chatcmpl-mock-stream",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                    ],
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+            def _usage_event(self, body: dict, question: str, chunks: int) -> bytes:
+                """stream_options.include_usage 时最后发送的用量分块（choices 为空）"""
+                payload = {
+                    "id": "chatcmpl-mock-stream",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": len(question),
+                        "completion_tokens": chunks,
+                        "total_tokens": len(question) + chunks,
+                    },
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+            def _stream(self, body: dict, question: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    self._write_chunk(self._event(body, {"role": "assistant"}, None))
+                    chunks = mock.completion_chunks(question)
+                    for field, text in chunks:
+                        time.sleep(mock.token_latency_s)
+                        self._write_chunk(self._event(body, {field: text}, None))
+                        mock._count("chunks_sent")
+                    self._write_chunk(self._event(body, {}, "stop"))
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        self._write_chunk(self._usage_event(body, question, len(chunks)))
+                    self._write_chunk(b"data: [DONE]\n\n")
+                    self._write_chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已提前结束请求，停止生成
+                    self.close_connection = True
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
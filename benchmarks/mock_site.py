@@ -0,0 +1,234 @@
+"""本地模拟问答站点：问题列表页（滚动分页 + 问题列表接口）、问题详情页与发布接口
+
+页面结构与爬虫/发布流程依赖的选择器保持一致：
+.question-item、.question-content.ZHIHUISHU_QZMD、“最新”标签、“我来回答”、
+“请输入您的回答”输入框和“立即发布”按钮。
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_COURSE_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>课程问答</title>
+<style>.question-item {{ min-height: 80px; border-bottom: 1px solid #eee; }}</style>
+</head>
+<body>
+<div class="tab-bar"><span id="tab-hot" class="tab">热门</span> <span id="tab-new" class="tab">最新</span></div>
+<div class="question-list"></div>
+<script>
+const COURSE = {course};
+const PAGE_SIZE = {page_size};
+const list = document.querySelector(".question-list");
+let sort = "hot", pageIndex = 0, loading = false, hasMore = true;
+async function load(reset) {{
+    if (reset) {{ pageIndex = 0; hasMore = true; }}
+    if (loading || !hasMore) return;
+    loading = true;
+    const response = await fetch(
+        `/api/question/list?course=${{COURSE}}&sort=${{sort}}&page=${{pageIndex}}&size=${{PAGE_SIZE}}`
+    );
+    const data = await response.json();
+    // 与真实站点一致：切换排序时旧列表保留到新数据返回后才替换
+    if (reset) list.innerHTML = "";
+    for (const q of data.rt.questionInfoList) {{
+        list.insertAdjacentHTML("beforeend",
+            `<div class="question-item" data-question-id="${{q.questionId}}">` +
+            `<a href="/question/${{COURSE}}/${{q.questionId}}" target="_blank">` +
+            `<div class="question-content ZHIHUISHU_QZMD">${{q.content}}</div></a>` +
+            `<span class="answer-num">${{q.answerNum}}回答</span>` +
+            `<span class="question-time">${{q.createTimeStr}}</span></div>`);
+    }}
+    pageIndex += 1;
+    hasMore = data.rt.hasMore;
+    loading = false;
+}}
+window.addEventListener("scroll", () => {{
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 50) load(false);
+}});
+document.getElementById("tab-new").addEventListener("click", () => {{ sort = "new"; load(true); }});
+document.getElementById("tab-hot").addEventListener("click", () => {{ sort = "hot"; load(true); }});
+load(true);
+</script>
+</body>
+</html>
+"""
+
+_QUESTION_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>问题详情</title></head>
+<body>
+<div class="detail-page">
+  <div class="question-content">{text}</div>
+  {answer_bar}
+  <div id="editor" style="display:none">
+    <textarea aria-label="请输入您的回答" placeholder="请输入您的回答"></textarea>
+    <span id="publish">立即发布</span>
+  </div>
+  <div id="result"></div>
+</div>
+<script>
+const bar = document.querySelector(".btn-wrap");
+if (bar) bar.addEventListener("click", () => {{
+    document.getElementById("editor").style.display = "block";
+}});
+document.getElementById("publish").addEventListener("click", async () => {{
+    const content = document.querySelector("textarea").value;
+    await fetch("/api/answer", {{
+        method: "POST",
+        headers: {{"Content-Type": "application/json"}},
+        body: JSON.stringify({{course: {course}, question: {question}, content}}),
+    }});
+    document.getElementById("editor").style.display = "none";
+    document.getElementById("result").textContent = "发布成功";
+}});
+</script>
+</body>
+</html>
+"""
+
+# 三层 div 都包含“我来回答”，与 answer.py 中 locator("div").filter(...).nth(2) 对应
+_ANSWER_BAR = (
+    '<div class="answer-bar"><div class="btn-wrap">'
+    '<div class="answer-btn">我来回答</div></div></div>'
+)
+
+
+class MockSite:
+    """模拟站点的数据与服务
+
+    Args:
+        courses: 课程数量
+        questions: 每门课程的问题数量
+        page_size: 问题列表每页条数（滚动加载下一页）
+        latency_s: 每个请求的额外延迟，模拟网络与服务端耗时
+    """
+
+    def __init__(
+        self, courses: int, questions: int, page_size: int = 20, latency_s: float = 0.0
+    ):
+        self.courses = courses
+        self.questions = questions
+        self.page_size = page_size
+        self.latency_s = latency_s
+        self.answers: dict[tuple[int, int], str] = {}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    def question_text(self, course: int, question: int) -> str:
+        return f"第{course}门课的第{question}个问题：这一章的重点内容应该怎么理解？"
+
+    def question_payload(self, course: int, sort: str, page: int, size: int) -> dict:
+        ids = list(range(1, self.questions + 1))
+        if sort == "new":
+            ids.reverse()
+        chunk = ids[page * size : (page + 1) * size]
+        now = time.time()
+        return {
+            "status": "200",
+            "rt": {
+                "pageIndex": page,
+                "hasMore": (page + 1) * size < len(ids),
+                "questionInfoList": [
+                    {
+                        "questionId": course * 100000 + q,
+                        "content": self.question_text(course, q),
+                        "answerNum": len(self.answers) % 7,
+                        "createTimeStr": time.strftime(
+                            "%Y-%m-%d %H:%M", time.localtime(now - q * 3600)
+                        ),
+                    }
+                    for q in chunk
+                ],
+            },
+        }
+
+    def course_url(self, course: int) -> str:
+        return f"{self.base_url}/course/{course}"
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockSite":
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # 静默访问日志
+                pass
+
+            def _send(self, status: int, body: str, content_type: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if site.latency_s:
+                    time.sleep(site.latency_s)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if match := re.fullmatch(r"/course/(\d+)", url.path):
+                    course = int(match.group(1))
+                    self._send(
+                        200,
+                        _COURSE_PAGE.format(course=course, page_size=site.page_size),
+                        "text/html",
+                    )
+                elif url.path == "/api/question/list":
+                    payload = site.question_payload(
+                        int(query["course"][0]),
+                        query.get("sort", ["hot"])[0],
+                        int(query.get("page", ["0"])[0]),
+                        int(query.get("size", [str(site.page_size)])[0]),
+                    )
+                    self._send(200, json.dumps(payload, ensure_ascii=False), "application/json")
+                elif match := re.fullmatch(r"/question/(\d+)/(\d+)", url.path):
+                    course = int(match.group(1))
+                    question = int(match.group(2)) % 100000
+                    with site._lock:
+                        answered = (course, question) in site.answers
+                    self._send(
+                        200,
+                        _QUESTION_PAGE.format(
+                            text=site.question_text(course, question),
+                            answer_bar="<div>已回答</div>" if answered else _ANSWER_BAR,
+                            course=course,
+                            question=question,
+                        ),
+                        "text/html",
+                    )
+                else:
+                    self._send(404, "not found", "text/plain")
+
+            def do_POST(self):
+                if site.latency_s:
+                    time.sleep(site.latency_s)
+                if self.path != "/api/answer":
+                    self._send(404, "not found", "text/plain")
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with site._lock:
+                    site.answers[(int(body["course"]), int(body["question"]))] = body[
+                        "content"
+                    ]
+                self._send(200, '{"status": "200"}', "application/json")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
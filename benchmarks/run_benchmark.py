@@ -0,0 +1,183 @@
+"""离线端到端基准：本地模拟问答站点 + 模拟 OpenAI 接口，驱动真实的爬取、回答与发布流程
+
+用法（在项目根目录执行）:
+    python -m benchmarks.run_benchmark --courses 4 --questions 20 --llm-latency 1.5
+
+默认 delay 为 0（零延迟模式，关闭随机偏移），结果可重复比较。
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import yaml
+
+from benchmarks.mock_openai import THINK_CHAR, MockOpenAI
+from benchmarks.mock_site import MockSite
+from src.configs import CONFIG_PATH_ENV
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="离线端到端基准测试")
+    parser.add_argument("--courses", type=int, default=2, help="课程数量")
+    parser.add_argument("--questions", type=int, default=10, help="每门课程的问题数量")
+    parser.add_argument("--page-size", type=int, default=20, help="问题列表每页条数")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="站点每个请求的延迟(秒)")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="模型接口延迟(秒)")
+    parser.add_argument(
+        "--endpoints", type=int, default=1, help="模型接口数量（第 i 个接口延迟为 i 倍）"
+    )
+    parser.add_argument("--llm-fail-rate", type=float, default=0.0, help="模型接口随机失败比例")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="模型接口随机抖动上限(秒)")
+    parser.add_argument("--think-chars", type=int, default=300, help="<think> 推理内容字符数")
+    parser.add_argument(
+        "--omit-think-open", action="store_true", help="模型省略 <think> 开始标签"
+    )
+    parser.add_argument(
+        "--token-latency", type=float, default=0.0, help="模型每个输出分块的生成耗时(秒)"
+    )
+    parser.add_argument("--no-stream", action="store_true", help="使用非流式请求")
+    parser.add_argument("--batch-size", type=int, default=1, help="批量模式每次请求的问题数")
+    parser.add_argument(
+        "--recycle-every", type=int, default=0, help="每个浏览器上下文最多处理的问题数（0=不限）"
+    )
+    parser.add_argument("--delay", type=int, default=0, help="delay_time_s，0 为零延迟模式")
+    parser.add_argument("--crawl-mode", choices=("dom", "xhr"), default="dom")
+    parser.add_argument("--sort", type=int, choices=(0, 1), default=0, help="0=热门 1=最新")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    return parser.parse_args()
+
+
+def write_config(
+    args: argparse.Namespace, site: MockSite, llms: list[MockOpenAI], work_dir: str
+) -> str:
+    """基于项目配置生成指向本地模拟服务的临时配置文件，返回其路径"""
+    with open("configs.yaml", "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    data["question-urls"] = [site.course_url(c) for c in range(1, args.courses + 1)]
+    data["option"].update(
+        delay_time_s=args.delay,
+        enabled_random_time=False,
+        question_classification=args.sort,
+        crawl_mode=args.crawl_mode,
+        max_questions=0,
+        max_question_age_days=0,
+        crawl_time_budget_s=3600,
+        question_url_template=f"{site.base_url}/question/{{course_id}}/{{id}}",
+    )
+    data["OpenAI"].update(
+        endpoints=[
+            {"name": f"mock-{i}", "base_url": llm.base_url, "api_key": "mock", "model": "mock"}
+            for i, llm in enumerate(llms, start=1)
+        ],
+        stream=not args.no_stream,
+        batch_size=args.batch_size,
+    )
+    # 缓存、问题索引和相似问题复用会让重复运行直接跳过工作，基准中关闭
+    data["cache"] = {"enabled": False}
+    data["question_index"] = {"enabled": False}
+    data["similar"] = {"enabled": False}
+    data["watchdog"] = {
+        **(data.get("watchdog") or {}),
+        "check_every": 1 if args.recycle_every else 10,
+        "max_questions_per_context": args.recycle_every,
+    }
+    data["spans"] = {"enabled": True, "dir": os.path.join(work_dir, "spans")}
+    data["logging"] = {**(data.get("logging") or {}), "dir": os.path.join(work_dir, "logs")}
+    path = os.path.join(work_dir, "configs.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    return path
+
+
+async def run(args: argparse.Namespace, site: MockSite) -> tuple[float, int]:
+    """返回 (总耗时, 更换浏览器上下文的次数)"""
+    # 配置在导入时加载，必须在设置环境变量之后再导入项目模块
+    from playwright.async_api import async_playwright
+
+    import main
+    from src.answer import shutdown_prefetch
+    from src.watchdog import BrowserSession
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=not args.headed)
+        context = await browser.new_context()
+        await main.prepare_context(context)
+        session = BrowserSession(browser, context, main.prepare_context)
+        start = time.perf_counter()
+        try:
+            await main.process_courses(session, main.config.courses)
+        finally:
+            elapsed = time.perf_counter() - start
+            await session.close()
+            await browser.close()
+            shutdown_prefetch()
+    return elapsed, session.recycles
+
+
+def report(
+    args: argparse.Namespace,
+    site: MockSite,
+    llms: list[MockOpenAI],
+    elapsed: float,
+    recycles: int,
+) -> None:
+    from src.instrument import recorder
+    from src.logger import Logger
+
+    Logger().flush()
+    total = args.courses * args.questions
+    posted = len(site.answers)
+    print()
+    print(f"课程 × 问题: {args.courses} × {args.questions}  (crawl_mode={args.crawl_mode})")
+    print(
+        f"已发布: {posted}/{total}  模型请求: {sum(llm.requests for llm in llms)}  "
+        f"模型输出分块: {sum(llm.chunks_sent for llm in llms)}  "
+        f"(stream={not args.no_stream}, batch_size={args.batch_size})"
+    )
+    for i, llm in enumerate(llms, start=1):
+        print(f"  mock-{i}: 请求 {llm.requests}  失败 {llm.failures}")
+    leaked = sum(THINK_CHAR in answer for answer in site.answers.values())
+    if leaked:
+        print(f"含推理内容的回答: {leaked}")
+    if recycles:
+        print(f"更换浏览器上下文: {recycles} 次")
+    print(f"总耗时: {elapsed:.2f}s  吞吐: {posted / elapsed if elapsed else 0:.2f} 题/秒")
+    print()
+    print(f"{'阶段':<24}{'次数':>6}{'p50(s)':>10}{'p95(s)':>10}{'max(s)':>10}")
+    for name, count, p50, p95, longest in recorder.summary():
+        print(f"{name:<26}{count:>6}{p50:>10.3f}{p95:>10.3f}{longest:>10.3f}")
+    recorder.close()
+
+
+def main() -> None:
+    args = parse_args()
+    site = MockSite(
+        args.courses, args.questions, page_size=args.page_size, latency_s=args.page_latency
+    ).start()
+    llms = [
+        MockOpenAI(
+            latency_s=args.llm_latency * i,
+            jitter_s=args.llm_jitter,
+            think_chars=args.think_chars,
+            think_open_tag=not args.omit_think_open,
+            token_latency_s=args.token_latency,
+            fail_rate=args.llm_fail_rate,
+        ).start()
+        for i in range(1, max(1, args.endpoints) + 1)
+    ]
+    try:
+        with tempfile.TemporaryDirectory(prefix="autoanswer-bench-") as work_dir:
+            os.environ[CONFIG_PATH_ENV] = write_config(args, site, llms, work_dir)
+            elapsed, recycles = asyncio.run(run(args, site))
+            report(args, site, llms, elapsed, recycles)
+    finally:
+        site.stop()
+        for llm in llms:
+            llm.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,110 @@
-import re
+from __future__ import annotations
+
+import argparse
 import asyncio
-from playwright.sync_api import (
-    sync_playwright,
-    Page,
-    Playwright,
-    Browser,
-    Locator,
-    BrowserContext,
-)
+import contextlib
+import os
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, AsyncIterator
 
-# from playwright.async_api import async_playwright, Page
 from src.configs import Config
 from src.logger import Logger
-from src.crawler import crawl_popular_question, crawl_latest_question
-from src.answer import answer
-from src.utils import load_cookies, save_cookies
+from src.crawler import (
+    QuestionRecord,
+    crawl_popular_question,
+    crawl_latest_question,
+)
+from src.answer import (
+    answer,
+    answer_cache,
+    prefetch_answer,
+    shutdown_prefetch,
+    similar_index,
+)
+from src.question_index import question_index
+from src.utils import load_cookies, save_cookies, session_cookies_valid
+from src.network import request_filter
+from src.waits import UrlMatches, goto, wait_ready
+from src.instrument import recorder, span, traced
+from src.watchdog import BrowserSession
+from src.har import DEFAULT_HAR_PATH, HarSession
+from src.profiler import profile_course
 import time
 
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page, Playwright
+
 config = Config()
 logger = Logger()
 
+# 命令行指定 --record/--replay 时设置
+har: HarSession | None = None
+
 
-def open_browser(playwright) -> tuple[Browser, BrowserContext]:
-    """启动浏览器并返回浏览器和上下文对象
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="智慧树问答自动回答")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record",
+        nargs="?",
+        const=DEFAULT_HAR_PATH,
+        metavar="HAR",
+        help=f"录制本次运行的网络流量（默认 {DEFAULT_HAR_PATH}）",
+    )
+    group.add_argument(
+        "--replay",
+        nargs="?",
+        const=DEFAULT_HAR_PATH,
+        metavar="HAR",
+        help="用录制的网络流量离线运行，不访问网站",
+    )
+    parser.add_argument(
+        "--replay-latency-ms", type=float, default=0, help="回放时每个请求附加的延迟（毫秒）"
+    )
+    parser.add_argument(
+        "--replay-miss",
+        choices=("abort", "fallback"),
+        default="abort",
+        help="回放时录制中没有的请求：abort=失败 fallback=访问网络",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="逐课程记录 CPU 采样和 Playwright trace，写入 res/profiles/<运行>/<课程序号>",
+    )
+    parser.add_argument(
+        "--profile-interval-ms", type=float, default=5, help="CPU 采样间隔（毫秒）"
+    )
+    return parser.parse_args(argv)
+
+
+@traced("open_browser")
+async def open_browser(playwright: Playwright) -> tuple[Browser | None, BrowserContext]:
+    """启动（或连接）浏览器并返回浏览器和上下文对象
+
+    - launch: 每次启动新的浏览器
+    - persistent: 使用固定的用户数据目录启动，登录状态保存在目录中
+    - cdp: 通过 CDP 连接已经在运行的浏览器，复用其中的登录状态
     Args:
         playwright: Playwright实例
     Returns:
-        tuple: 包含浏览器实例和上下文对象的元组
+        tuple: 包含浏览器实例和上下文对象的元组（persistent 模式下浏览器可能为 None）
     Raises:
         Exception: 浏览器启动失败时抛出异常
     """
     try:
+        if config.browser_mode == "cdp":
+            browser = await playwright.chromium.connect_over_cdp(config.cdp_url)
+            # 复用浏览器已有的默认上下文，其中保留了登录状态
+            if browser.contexts:
+                context = browser.contexts[0]
+            else:
+                context = await browser.new_context()
+            logger.info(f"已连接到运行中的浏览器: {config.cdp_url}")
+            # 用户自己的上下文：不安装过滤和脚本，也不用本地Cookie覆盖其中的登录状态
+            await prepare_context(context, owned=False)
+            return browser, context
+
         # 使用Chromium内核启动浏览器
         launch_kwargs = {
             "channel": config.driver,
@@ -44,28 +118,65 @@ def open_browser(playwright) -> tuple[Browser, BrowserContext]:
         }
         if config.browser_path:
             launch_kwargs["executable_path"] = config.browser_path
-        # 启动浏览器
-        browser = playwright.chromium.launch(**launch_kwargs)
-        # 创建新的浏览器上下文
-        context = browser.new_context()
-        # 加载反检测脚本（避免被识别为自动化工具）
-        with open("scripts/stealth.min.js", "r", encoding="utf-8") as f:
-            stealth_js = f.read()
-        context.add_init_script(stealth_js)
-        # 加载本地Cookie
-        cookies = load_cookies("res/cookies.json")
-        if cookies:
-            context.add_cookies(cookies)  
-            logger.info("已加载本地Cookie，尝试免密登录")
+        if config.browser_mode == "persistent":
+            context = await playwright.chromium.launch_persistent_context(
+                config.user_data_dir, **launch_kwargs
+            )
+            browser = context.browser
+            logger.info(f"已使用用户数据目录启动浏览器: {config.user_data_dir}")
+            # 用户数据目录中的登录状态比本地Cookie文件更新，不再加载
+            await prepare_context(context, owned=False)
         else:
-            logger.info("未找到本地Cookie，将进行手动登录")
+            # 启动浏览器
+            browser = await playwright.chromium.launch(**launch_kwargs)
+            # 创建新的浏览器上下文
+            context = await browser.new_context()
+            await prepare_context(context)
         return browser, context
     except Exception as e:
         logger.error(f"浏览器启动失败: {e}")
         raise
 
 
-def login(page: Page,context: BrowserContext) -> Page:
+async def prepare_context(context: BrowserContext, owned: bool = True) -> None:
+    """为新建的浏览器上下文安装请求过滤、反检测脚本并加载本地Cookie
+    Args:
+        context: 浏览器上下文
+        owned: 上下文是否由本程序新建；persistent/cdp 模式沿用的上下文只录制或回放网络流量
+    """
+    # 拦截与问答无关的资源请求（图片、字体、统计脚本等）
+    if owned and request_filter:
+        await request_filter.install(context)
+    # 录制或回放网络流量（回放路由需在请求过滤之后注册，才能先于过滤执行）
+    if har:
+        await har.install(context)
+    if not owned:
+        return
+    # 加载反检测脚本（避免被识别为自动化工具）
+    with open("scripts/stealth.min.js", "r", encoding="utf-8") as f:
+        stealth_js = f.read()
+    await context.add_init_script(stealth_js)
+    # 加载本地Cookie（已过期的会被丢弃）
+    cookies = load_cookies("res/cookies.json")
+    if cookies:
+        await context.add_cookies(cookies)
+        logger.info("已加载本地Cookie，尝试免密登录")
+    else:
+        logger.info("未找到本地Cookie，将进行手动登录")
+
+
+async def session_known_good(context: BrowserContext) -> bool:
+    """根据上下文中Cookie的过期时间判断登录状态是否仍然有效（不访问网络）"""
+    if not config.skip_login_check:
+        return False
+    return session_cookies_valid(
+        await context.cookies(),
+        names=config.auth_cookie_names,
+        min_ttl_s=config.cookie_min_ttl_s,
+    )
+
+
+async def login(page: Page, context: BrowserContext) -> Page:
     """登录到智慧树网
     Args:
         page: Playwright页面对象
@@ -77,7 +188,7 @@ def login(page: Page,context: BrowserContext) -> Page:
     """
     try:
         # 访问登录页面（设置30秒超时）
-        page.goto(config.login_url, timeout=30000)
+        await goto(page, config.login_url, timeout=30000)
         # 首次检查URL：如果不含"login"，说明Cookie有效
         if "login" not in page.url:
             logger.info("检测到已通过Cookie登录，跳过手动登录")
@@ -86,18 +197,22 @@ def login(page: Page,context: BrowserContext) -> Page:
         
         # 填写用户名和密码
         username_input = page.get_by_role("textbox", name="请输入手机号")
-        username_input.fill(str(config.username), timeout=10000)
+        await username_input.fill(str(config.username), timeout=10000)
         password_input = page.get_by_role("textbox", name="请输入密码")
-        password_input.fill(str(config.password), timeout=10000)
+        await password_input.fill(str(config.password), timeout=10000)
 
         # 点击登录按钮
-        page.get_by_text("登 录").click(timeout=5000)
+        await page.get_by_text("登 录").click(timeout=5000)
         logger.warn("请手动完成验证码验证！")  # 需要人工干预验证码
 
-        # 等待网络空闲（最长等待60秒）
-        page.wait_for_load_state("networkidle", timeout=60000)
+        # 等待离开登录页（验证码需要人工完成，超时时间较长）
+        await wait_ready(
+            page,
+            UrlMatches(lambda url: "login" not in url, config.login_timeout_s),
+            step="登录",
+        )
         # 确认登录后再保存Cookie（此时URL已无"login"，确保有效）
-        cookies = context.cookies()
+        cookies = await context.cookies()
         save_cookies(cookies, "res/cookies.json")
         logger.info("已保存有效登录Cookie到: res/cookies.json")
         logger.info("登录成功！")
@@ -110,56 +225,192 @@ def login(page: Page,context: BrowserContext) -> Page:
         raise
 
 
-def main():
-    start_time = time.time()  # 总开始时间
+_END = object()  # 问题流结束标记
 
-    with sync_playwright() as playwright:
-        try:
-            # 初始化浏览器
-            browser, context = open_browser(playwright)
-
-            # 登录操作
-            login_page = context.new_page()
-            login_start = time.time()  # 登录计时开始
-            login(login_page,context)
-            logger.info(f"登录耗时: {time.time() - login_start:.2f}秒")  # 记录登录耗时
-            login_page.close()
-
-            # 遍历课程
-            for index, course_url in enumerate(config.courses):
-                course_start = time.time()  # 单课程计时开始
-                page = context.new_page()
-                try:
-                    logger.info(f"开始处理课程 {index+1}/{len(config.courses)}")
 
-                    # 爬取问题计时
-                    crawl_start = time.time()
+class CourseFeed:
+    """单个课程的问题流
+
+    爬取任务边滚动加载边把问题放入队列（同时提交回答预取），
+    发布循环按课程顺序逐个消费，无需等待整门课程爬取完成。
+    课程页面在开始爬取时才打开，使用浏览器会话当时的上下文。
+    """
+
+    def __init__(self, session: BrowserSession, course_url: str):
+        self.session = session
+        self.page: Page | None = None
+        self.opened = asyncio.Event()  # 页面已打开（或打开前出错）
+        self.course_url = course_url
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce(self, semaphore: asyncio.Semaphore) -> None:
+        """爬取课程问题并放入队列（同时爬取的课程数受 semaphore 限制）"""
+        try:
+            async with semaphore:
+                self.page = await self.session.new_page()
+                self.opened.set()
+                with span("crawl", url=self.course_url) as crawl_span:
                     if config.question_classification == 0:
-                        questions = crawl_popular_question(page, course_url)
+                        questions = crawl_popular_question(self.page, self.course_url)
                     else:
-                        questions = crawl_latest_question(page, course_url)
-                    logger.info(f"问题爬取耗时: {time.time() - crawl_start:.2f}秒")
+                        questions = crawl_latest_question(self.page, self.course_url)
+                    count = 0
+                    async for record in questions:
+                        # 问题一出现就开始生成回答
+                        await self._queue.put((record, prefetch_answer(record["text"])))
+                        count += 1
+                    crawl_span.attrs["questions"] = count
+                logger.info(
+                    f"问题爬取耗时: {crawl_span.duration:.2f}秒 - {self.course_url}"
+                )
+        except Exception as e:
+            await self._queue.put(e)
+        finally:
+            self.opened.set()
+            await self._queue.put(_END)
+
+    async def __aiter__(self) -> AsyncIterator[tuple[QuestionRecord, Future]]:
+        while True:
+            item = await self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
 
-                    # 回答问题计时
-                    answer_start = time.time()
-                    answer(page, questions)
-                    logger.info(f"回答处理耗时: {time.time() - answer_start:.2f}秒")
 
-                    logger.info(f"成功完成课程: {course_url}")
+async def process_courses(
+    session: BrowserSession,
+    courses: list[str],
+    profile_dir: str | None = None,
+    profile_interval_s: float = 0.005,
+) -> None:
+    """并发爬取所有课程（受 crawl_concurrency 限制），按课程顺序串行发布回答
+    Args:
+        session: 已登录的浏览器会话
+        courses: 课程问答页URL列表
+        profile_dir: 性能分析输出目录，指定时每门课程写入一个子目录；
+            此时课程逐个爬取，每门课程的分析结果只包含它自己的爬取和发布过程
+        profile_interval_s: CPU 采样间隔（秒）
+    """
+    semaphore = asyncio.Semaphore(config.crawl_concurrency)
+    feeds = [CourseFeed(session, course_url) for course_url in courses]
+    crawl_tasks = (
+        [] if profile_dir else [asyncio.create_task(feed.produce(semaphore)) for feed in feeds]
+    )
+    try:
+        # 遍历课程
+        for index, feed in enumerate(feeds):
+            with span("course", index=index + 1, url=feed.course_url) as course_span:
+                try:
+                    logger.info(f"开始处理课程 {index+1}/{len(courses)}")
+                    if profile_dir:
+                        profiling = profile_course(
+                            session.context,
+                            os.path.join(profile_dir, str(index + 1)),
+                            f"课程{index + 1} {feed.course_url}",
+                            profile_interval_s,
+                        )
+                    else:
+                        profiling = contextlib.nullcontext()
+                    async with profiling:
+                        if profile_dir:
+                            # 性能分析时在分析范围内才开始爬取该课程
+                            crawl_tasks.append(asyncio.create_task(feed.produce(semaphore)))
+                        # 边爬取边回答，该课程的后续问题仍在后台加载
+                        await feed.opened.wait()
+                        await answer(feed.page, feed, feed.course_url, session)
+
+                    logger.info(f"成功完成课程: {feed.course_url}")
                 except Exception as e:
-                    logger.error(f"课程处理失败: {course_url} - {str(e)}")
+                    course_span.error = str(e)
+                    logger.error(f"课程处理失败: {feed.course_url} - {str(e)}")
                 finally:
-                    page.close()
-                    # 记录单课程耗时
-                    logger.info(
-                        f"课程{index+1}总耗时: {time.time() - course_start:.2f}秒\n"
-                    )
+                    if feed.page:
+                        await feed.page.close()
+            # 记录单课程耗时
+            logger.info(f"课程{index+1}总耗时: {course_span.duration:.2f}秒\n")
+    finally:
+        # 提前退出时取消仍在进行的爬取任务
+        for task in crawl_tasks:
+            task.cancel()
+
+
+async def main(args: argparse.Namespace | None = None):
+    global har
+    start_time = time.time()  # 总开始时间
+    if args and (args.record or args.replay):
+        if config.browser_mode == "cdp":
+            raise ValueError("cdp 模式下不能录制或回放网络流量")
+        har = HarSession(
+            "record" if args.record else "replay",
+            args.record or args.replay,
+            latency_ms=args.replay_latency_ms,
+            not_found=args.replay_miss,
+        )
+        # 录制的问题会被标记为已回答，回放时再被过滤掉；录制和回放期间不读写问题索引
+        if question_index:
+            question_index.suspend()
+            logger.info("录制/回放网络流量期间不使用问题索引")
+    # 延迟导入，只在真正启动浏览器时加载 playwright
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        browser = session = None
+        try:
+            # 初始化浏览器
+            browser, context = await open_browser(playwright)
+            # HAR 按上下文录制和回放，运行期间不更换上下文
+            session = BrowserSession(
+                browser if config.browser_mode != "persistent" and not har else None,
+                context,
+                prepare_context,
+                owns_context=config.browser_mode != "cdp",
+                track_rss=config.browser_mode != "cdp",
+            )
+
+            # 登录操作：本地Cookie未过期时跳过登录页
+            if await session_known_good(context):
+                logger.info("本地Cookie未过期，跳过登录检查")
+            else:
+                login_page = await context.new_page()
+                with span("login") as login_span:
+                    await login(login_page, context)
+                logger.info(f"登录耗时: {login_span.duration:.2f}秒")  # 记录登录耗时
+                await login_page.close()
+
+            profile_dir = None
+            if args and args.profile:
+                profile_dir = os.path.join("res", "profiles", recorder.run_id)
+            await process_courses(
+                session,
+                config.courses,
+                profile_dir,
+                args.profile_interval_ms / 1000 if args else 0.005,
+            )
 
         finally:
-            context.close()
-            browser.close()
+            # cdp 模式下不关闭复用的上下文，关闭浏览器也只是断开连接
+            if session:
+                await session.close()
+                if session.recycles:
+                    logger.info(f"本次运行共更换浏览器上下文 {session.recycles} 次")
+            if browser:
+                await browser.close()
+            shutdown_prefetch()
+            if request_filter:
+                request_filter.log_stats()
+            if answer_cache:
+                answer_cache.log_stats()
+            if similar_index:
+                similar_index.log_stats()
+            recorder.log_summary()
+            recorder.close()
             total_time = time.time() - start_time  # 计算总耗时
+            if har and har.mode == "record":
+                logger.info(f"网络流量已写入: {har.path}")
             logger.info(f"任务总耗时: {total_time:.2f}秒")
+            logger.flush()  # 日志由后台线程输出，先输出完再打印结束语
             print(
                 f"""
    ╱|、　　　　　　　　　　　ฅ^•ﻌ•^ฅ
@@ -178,4 +429,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main(parse_args()))
@@ -1,148 +1,678 @@
-from openai import OpenAI
+from __future__ import annotations
+
 import re
+import time
+from urllib.parse import urldefrag, urlsplit
 from src.logger import Logger
 from src.configs import Config
-import time
-from playwright.sync_api import Page
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterable
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from src.utils import get_random
+from src.waits import SelectorVisible, goto, wait_ready
+from src.backends import AnswerBackend
+from src.cache import AnswerCache
+from src.similar import SimilarQuestionIndex
+from src.instrument import current_span, span, traced
+from src.crawler import QuestionRecord
+from src.batch import BatchCollector, build_batch_prompt, parse_batch_answers
+from src.router import RequestCancelled, hedge_cancelled, llm_router
+from src.retrieval import CorpusIndex, RetrievalBackend
+from src.streaming import ThinkFilter, complete_answer
+from src.question_index import (
+    question_index,
+    STATUS_ANSWERED,
+    STATUS_FAILED,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import Locator, Page
+
+    from src.router import Endpoint
+    from src.watchdog import BrowserSession
 
 logger = Logger()
 config = Config()
 
-client = OpenAI(
-    api_key=config.openai_api_key,
-    base_url=config.openai_base_url,
+# 修改 SYSTEM_PROMPT 时需同步递增版本号，使旧缓存自动失效
+PROMPT_VERSION = 1
+SYSTEM_PROMPT = "你是一个严谨的中文学生，请你回答同学的问题来帮助同学，回答需满足：\n1. 用口语化中文，50字内分点回答\n2. 回避政治、暴力、伦理等敏感内容\n3. 若问题敏感，回复'此问题不便讨论'\n4. 禁用Markdown格式\n请确保内容符合中国法律法规。"
+
+answer_cache: AnswerCache | None = (
+    AnswerCache(
+        config.cache_path,
+        max_entries=config.cache_max_entries,
+        ttl_s=config.cache_ttl_hours * 3600,
+    )
+    if config.cache_enabled
+    else None
 )
 
+similar_index: SimilarQuestionIndex | None = (
+    SimilarQuestionIndex(
+        config.similar_path,
+        threshold=config.similar_threshold,
+        max_entries=config.similar_max_entries,
+        prompt_version=PROMPT_VERSION,
+    )
+    if config.similar_enabled
+    else None
+)
+
+
+def _cache_key(question: str) -> str:
+    return AnswerCache.make_key(
+        question, config.openai_model, config.temperature, PROMPT_VERSION
+    )
+
+
+def _reuse_answer(question: str) -> str | None:
+    """依次查找完全相同（回答缓存）和近似重复（相似问题索引）的已回答问题"""
+    # 批量模式下在计时范围之外调用，此时没有当前 span
+    attrs = current_span().attrs if current_span() else {}
+    if answer_cache:
+        cached = answer_cache.get(_cache_key(question))
+        if cached is not None:
+            attrs["cache"] = "hit"
+            logger.info(f"命中回答缓存：{cached}")
+            return cached
+    if similar_index:
+        match = similar_index.lookup(question)
+        if match:
+            similar_question, ans, score = match
+            attrs.update(cache="similar", similarity=round(score, 3))
+            logger.info(f"复用相似问题的回答（相似度 {score:.2f}）：{similar_question} -> {ans}")
+            if answer_cache:
+                answer_cache.set(_cache_key(question), ans)
+            return ans
+    return None
+
+
+def _remember_answer(question: str, ans: str) -> None:
+    """记录新生成的回答，供之后相同或相似的问题复用"""
+    if answer_cache:
+        answer_cache.set(_cache_key(question), ans)
+    if similar_index:
+        similar_index.add(question, ans)
+
+
+class LLMBackend(AnswerBackend):
+    """通过模型接口生成回答（在多个接口之间选择、重试）"""
+
+    name = "llm"
+    remote = True
+
+    def answer(self, question: str) -> str | None:
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"问题：{question}"},
+        ]
+        request = _stream_answer if config.openai_stream else _fetch_answer
+        ans = llm_router.call(lambda endpoint: request(endpoint, messages))
+        logger.info("请求成功！")
+        return ans
+
+
+def _build_backends() -> list[AnswerBackend]:
+    """按配置组装回答后端：先查本地资料，置信度不足时再请求模型"""
+    backends: list[AnswerBackend] = []
+    if config.retrieval_enabled:
+        index = CorpusIndex(
+            config.retrieval_corpus_dir,
+            config.retrieval_index_dir,
+            max_segments=config.retrieval_max_segments,
+        )
+        backends.append(
+            RetrievalBackend(
+                index,
+                min_confidence=config.retrieval_min_confidence,
+                top_k=config.retrieval_top_k,
+                max_chars=config.retrieval_max_chars,
+            )
+        )
+    if not backends or config.retrieval_llm_fallback:
+        backends.append(LLMBackend())
+    return backends
+
+
+answer_backends = _build_backends()
+
 
-def get_answer(question: str) -> str:
+def _answer_with(backends: list[AnswerBackend], question: str) -> str | None:
+    """依次尝试各个后端，返回第一个回答"""
+    for backend in backends:
+        try:
+            ans = backend.answer(question)
+        except Exception as e:
+            logger.error(f"回答后端 {backend.name} 请求失败: {str(e)}")
+            continue
+        if ans:
+            if current_span():
+                current_span().attrs["backend"] = backend.name
+            logger.info(f"回答：{ans}")
+            # 本地资料的回答随资料更新，只记录模型生成的回答
+            if backend.remote:
+                _remember_answer(question, ans)
+            return ans
+    return None
+
+
+@traced("get_answer")
+def get_answer(question: str) -> str | None:
+    """生成单个问题的回答（先复用已有回答，再依次尝试各个回答后端）
+    Args:
+        question: 问题文本
+    Returns:
+        str | None: 回答；所有后端都无法回答时返回 None，调用方不应发布
+    """
+    reused = _reuse_answer(question)
+    if reused is not None:
+        return reused
+    return _answer_with(answer_backends, question)
+
+
+def _fetch_answer(endpoint: Endpoint, messages: list[dict]) -> str:
+    """非流式请求：等待完整输出后去除推理内容"""
+    current_span().attrs["endpoint"] = endpoint.name
+    completion = endpoint.client.chat.completions.create(
+        model=endpoint.model,
+        messages=messages,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+    )
+    ans: str = completion.choices[0].message.content or ""
+    if completion.usage:
+        current_span().attrs.update(
+            prompt_tokens=completion.usage.prompt_tokens,
+            completion_tokens=completion.usage.completion_tokens,
+            total_tokens=completion.usage.total_tokens,
+        )
+    ans = re.sub(r"<think>.*?</think>", "", ans, flags=re.DOTALL).strip()
+    if not ans:
+        # 空回答视为失败，由路由器换接口重试
+        raise ValueError("模型返回了空回答")
+    return ans
+
+
+def _stream_answer(endpoint: Endpoint, messages: list[dict]) -> str:
+    """流式请求：边接收边丢弃推理内容，回答完整后立即断开，不再消耗后续 token"""
+    current_span().attrs["endpoint"] = endpoint.name
+    stream = endpoint.client.chat.completions.create(
+        model=endpoint.model,
+        messages=messages,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        stream=True,
+        # 完整读完时最后一个分块带有用量统计
+        stream_options={"include_usage": True},
+    )
+    think = ThinkFilter()
+    start = time.perf_counter()
+    first_answer_s = None
+    chunks = 0
+    usage = None
+    ans = None
+    # 正文中已确定不含推理内容时才能提前结束：模型省略 <think> 开始标签时，
+    # 见到 </think> 之前的正文都可能是推理
+    settled = not config.reasoning_in_content
     try:
-        completion = client.chat.completions.create(
-            model=config.openai_model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "你是一个严谨的中文学生，请你回答同学的问题来帮助同学，回答需满足：\n1. 用口语化中文，50字内分点回答\n2. 回避政治、暴力、伦理等敏感内容\n3. 若问题敏感，回复'此问题不便讨论'\n4. 禁用Markdown格式\n请确保内容符合中国法律法规。",
-                },
-                {"role": "user", "content": f"问题：{question}"},
-            ],
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            chunks += 1
+            if hedge_cancelled():
+                raise RequestCancelled("另一个接口已先返回回答")
+            delta = chunk.choices[0].delta
+            # 部分服务把推理放在 delta.reasoning_content 中单独返回，直接忽略，正文即回答
+            if getattr(delta, "reasoning_content", None):
+                settled = True
+            content = delta.content
+            if not content:
+                continue
+            think.feed(content)
+            if first_answer_s is None and think.answer.strip():
+                first_answer_s = time.perf_counter() - start
+            if not (settled or think.closed):
+                continue
+            ans = complete_answer(
+                think.answer, config.answer_max_chars, config.stop_at_blank_line
+            )
+            if ans is not None:
+                break
+    finally:
+        # 提前结束时关闭响应，服务端随之停止生成
+        stream.close()
+    current_span().attrs.update(
+        stream_chunks=chunks,
+        thinking_chars=think.thinking_chars,
+        stopped_early=ans is not None,
+        first_answer_s=round(first_answer_s, 3) if first_answer_s is not None else None,
+    )
+    if usage:
+        current_span().attrs.update(
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            total_tokens=usage.total_tokens,
+        )
+    else:
+        # 提前断开时服务端不会返回用量，按收到的分块数估计（通常一个分块对应一个 token）
+        current_span().attrs.update(completion_tokens=chunks, usage_estimated=True)
+    if ans is None:
+        ans = think.finish()
+        ans = complete_answer(ans, config.answer_max_chars, config.stop_at_blank_line) or ans
+    if not ans:
+        raise ValueError("模型返回了空回答")
+    return ans
+
+
+@traced("get_answer_batch")
+def get_answers_batch(questions: list[str]) -> dict[int, str]:
+    """一次请求回答多个问题（系统提示词只发送一次）
+    Args:
+        questions: 本批问题
+    Returns:
+        dict[int, str]: 问题下标 -> 回答，只包含成功解析的问题，其余由调用方单独请求
+    """
+    current_span().attrs["size"] = len(questions)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_batch_prompt(questions)},
+    ]
+
+    def request(endpoint: Endpoint) -> dict[int, str]:
+        current_span().attrs["endpoint"] = endpoint.name
+        completion = endpoint.client.chat.completions.create(
+            model=endpoint.model,
+            messages=messages,
             temperature=config.temperature,
-            max_tokens=config.max_tokens,
+            max_tokens=config.max_tokens * len(questions),
         )
-        ans: str = completion.choices[0].message.content
-        logger.info("请求成功！")
-        ans = re.sub(r"<think>.*?</think>", "", ans, flags=re.DOTALL).strip()
-        logger.info(f"回答：{ans}")
-        return ans
+        if completion.usage:
+            current_span().attrs.update(
+                prompt_tokens=completion.usage.prompt_tokens,
+                completion_tokens=completion.usage.completion_tokens,
+                total_tokens=completion.usage.total_tokens,
+            )
+        return parse_batch_answers(
+            completion.choices[0].message.content or "", len(questions)
+        )
+
+    try:
+        answers = llm_router.call(request)
     except Exception as e:
-        logger.error(f"API请求失败: {str(e)}")
-        return "当前服务暂不可用，请稍后再试"
+        logger.error(f"批量请求失败: {str(e)}")
+        return {}
+    current_span().attrs["parsed"] = len(answers)
+    logger.info(f"批量请求成功：解析 {len(answers)}/{len(questions)} 个回答")
+    for index, ans in answers.items():
+        _remember_answer(questions[index], ans)
+    return answers
+
+
+def _chain(source: Future, target: Future) -> None:
+    """source 完成后把结果转交给 target"""
+
+    def done(future: Future) -> None:
+        if future.cancelled():
+            target.set_exception(CancelledError())
+        elif future.exception() is not None:
+            target.set_exception(future.exception())
+        else:
+            target.set_result(future.result())
+
+    source.add_done_callback(done)
+
+
+def _run_batch(items: list[tuple[str, Future]]) -> None:
+    """处理一批问题：先复用已有回答和本地后端，剩余问题合并为一次请求，解析失败的问题单独请求"""
+    # 已取消的问题不再处理
+    items = [(q, future) for q, future in items if future.set_running_or_notify_cancel()]
+    local_backends = [backend for backend in answer_backends if not backend.remote]
+    use_llm = any(backend.remote for backend in answer_backends)
+    try:
+        pending = []
+        for q, future in items:
+            reused = _reuse_answer(q)
+            if reused is None and local_backends:
+                reused = _answer_with(local_backends, q)
+            if reused is not None:
+                future.set_result(reused)
+            else:
+                pending.append((q, future))
+        if use_llm and len(pending) > 1:
+            answers = get_answers_batch([q for q, _ in pending])
+        else:
+            answers = {}
+        for index, (q, future) in enumerate(pending):
+            if index in answers:
+                future.set_result(answers[index])
+            elif not use_llm:
+                future.set_result(None)
+            else:
+                _chain(_get_executor().submit(get_answer, q), future)
+    except Exception as e:
+        for _, future in items:
+            if not future.done():
+                future.set_exception(e)
+
+
+def _submit_batch(items: list[tuple[str, Future]]) -> None:
+    _get_executor().submit(_run_batch, items)
+
+
+_executor: ThreadPoolExecutor | None = None
+_collector: BatchCollector | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """懒加载回答生成线程池，工作线程数由配置限制"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=config.prefetch_workers, thread_name_prefix="answer"
+        )
+    return _executor
+
+
+def _get_collector() -> BatchCollector:
+    global _collector
+    if _collector is None:
+        _collector = BatchCollector(config.batch_size, config.batch_wait_s, _submit_batch)
+    return _collector
+
+
+def prefetch_answer(question: str) -> Future:
+    """提交单个问题的回答生成任务，立即返回 Future
+
+    启用批量模式时问题先攒批，攒满或等待超时后合并为一次请求。
+    """
+    if config.batch_size > 1:
+        return _get_collector().add(question)
+    return _get_executor().submit(get_answer, question)
+
+
+def prefetch_answers(questions: list[str]) -> list[Future]:
+    """在后台并发生成回答，立即返回与问题一一对应的 Future 列表"""
+    if config.batch_size <= 1:
+        return [prefetch_answer(q) for q in questions]
+    # 问题已全部就绪，直接按批次大小分组提交，无需等待
+    futures = [Future() for _ in questions]
+    items = list(zip(questions, futures))
+    for start in range(0, len(items), config.batch_size):
+        _submit_batch(items[start : start + config.batch_size])
+    return futures
+
+
+def shutdown_prefetch() -> None:
+    """关闭线程池，取消尚未开始的回答生成任务"""
+    global _executor, _collector
+    if _collector is not None:
+        _collector.cancel()
+        _collector = None
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    llm_router.shutdown()
 
 
 def process_questions(questions: list) -> list:
+    """并发生成全部回答，返回顺序与问题顺序一致（生成失败的为 None）"""
     answers = []
     total_questions = len(questions)
-    for index, q in enumerate(questions, start=1):
+    futures = prefetch_answers(questions)
+    for index, future in enumerate(futures, start=1):
+        ans = future.result()
         logger.info(f"处理中：{index}/{total_questions}")  # 显示当前进度
-        ans = get_answer(q)
         answers.append(ans)
     return answers
 
 
-def upload_answer(page: Page, q: str) -> bool:
-    """协调各个步骤的上传回答流程"""
-    page2 = open_answer_page(page, q)
+async def upload_answer(
+    page: Page,
+    q: str,
+    pending: Future | None = None,
+    course_url: str | None = None,
+    url: str | None = None,
+    worker: Page | None = None,
+) -> bool:
+    """协调各个步骤的上传回答流程
+    Args:
+        page: 问题列表页面
+        q: 问题文本
+        pending: 后台预取的回答，为空时在线程池中调用 get_answer
+        course_url: 所属课程URL，用于更新问题索引
+        url: 问题详情链接，与 worker 同时提供时直接在 worker 中打开
+        worker: 复用的回答页面（发布后不关闭）
+    """
+    page2 = await open_answer_page(page, q, url, worker)
     if not page2:
+        _mark_question(course_url, q, STATUS_FAILED)
         return False
 
     try:
-        if check_had_answered(page2):
+        if await check_had_answered(page2):
+            # 页面上既没有按钮也没有该问题时，打开的不是该问题的详情页，不能记为已回答
+            if not await _shows_question(page2, q, 1):
+                logger.warn(f"回答页面中没有找到该问题，稍后重试：{q}")
+                _mark_question(course_url, q, STATUS_FAILED)
+                return False
+            _mark_question(course_url, q, STATUS_ANSWERED)
+            return False
+        elif not await click_answer_button(page2):
+            _mark_question(course_url, q, STATUS_FAILED)
             return False
-        elif not click_answer_button(page2):
+        if pending is None:
+            pending = prefetch_answer(q)
+        a: str | None = await asyncio.wrap_future(pending)
+        if not a:
+            # 模型不可用时不发布任何内容，下次运行重新尝试
+            logger.warn(f"未能生成回答，跳过：{q}")
+            _mark_question(course_url, q, STATUS_FAILED)
             return False
-        a: str = get_answer(q)
-        if not fill_answer_content(page2, a):
+        if not await fill_answer_content(page2, a) or not await submit_answer(page2):
+            _mark_question(course_url, q, STATUS_FAILED)
             return False
 
-        return submit_answer(page2)
+        _mark_question(course_url, q, STATUS_ANSWERED)
+        return True
     finally:
-        # 确保无论成功与否都会关闭页面（如果未被提前关闭）
-        if "page2" in locals() and page2:
-            page2.close()
+        # 点击打开的新标签页用完即关闭，复用的页面留给下一题
+        if page2 is not worker:
+            await page2.close()
 
 
-def open_answer_page(page: Page, question: str) -> Page | None:
+def _mark_question(course_url: str | None, question: str, status: str) -> None:
+    """更新问题索引（未启用索引或未提供课程时忽略）"""
+    if question_index and course_url:
+        question_index.mark(course_url, question, status)
+
+
+_COURSE_ID_PATTERN = re.compile(r"(\d+)(?!.*\d)")
+
+
+def question_url(record: QuestionRecord, course_url: str | None) -> str | None:
+    """问题详情链接：优先使用页面上的链接，否则按 question_url_template 拼接"""
+    if record["href"]:
+        return record["href"]
+    if not config.question_url_template or not record["id"]:
+        return None
+    course_id = None
+    if course_url:
+        # 单页应用的路由写在 # 之后，其中也可能带有查询参数
+        parts = urlsplit(course_url)
+        match = _COURSE_ID_PATTERN.search(parts.path + parts.fragment.split("?")[0])
+        course_id = match.group(1) if match else None
+    if "{course_id}" in config.question_url_template and course_id is None:
+        return None
+    return config.question_url_template.format(id=record["id"], course_id=course_id)
+
+
+async def _navigate_worker(worker: Page, url: str) -> None:
+    """在复用的页面中打开问题详情"""
+    same_document = url != worker.url and urldefrag(url).url == urldefrag(worker.url).url
+    await goto(worker, url, timeout=config.page_timeout_s * 1000, wait_until="domcontentloaded")
+    if same_document:
+        # 只有 # 之后不同时浏览器不会重新加载，上一题的页面内容可能残留
+        await worker.reload(wait_until="domcontentloaded")
+
+
+@traced("open_answer_page")
+async def open_answer_page(
+    page: Page, question: str, url: str | None = None, worker: Page | None = None
+) -> Page | None:
+    """打开问题的回答页面
+    Args:
+        page: 问题列表页面
+        question: 问题文本
+        url: 问题详情链接
+        worker: 复用的回答页面
+    Returns:
+        Page | None: 回答页面（可能是 worker 或新打开的标签页），失败时返回 None
+    """
+    if url and worker:
+        try:
+            await _navigate_worker(worker, url)
+            # 链接可能有误（模板配置错误或取到了其他链接），确认页面上有该问题
+            if await _shows_question(worker, question, config.answer_button_timeout_s):
+                return worker
+            logger.warn(f"直接打开的页面不是该问题的详情页，改为点击问题: {url}")
+        except Exception as e:
+            logger.warn(f"直接打开问题页面失败，改为点击问题: {e}")
     try:
-        with page.expect_popup() as page2_info:
-            page.get_by_text(question).click()
-        return page2_info.value
+        async with page.expect_popup() as page2_info:
+            await page.get_by_text(question).click()
+        return await page2_info.value
     except Exception as e:
         logger.error(f"打开回答页面失败: {e}")
         return None
 
 
-def check_had_answered(page: Page) -> bool:
-    # 等待页面加载完成，确保所有网络请求都已完成
-    page.wait_for_load_state("networkidle")
+def _question_snippet(question: str) -> str:
+    """问题正文的第一行（最多 30 字），用于在详情页中定位问题"""
+    lines = question.strip().splitlines()
+    return lines[0].strip()[:30] if lines else ""
+
+
+async def _shows_question(page: Page, question: str, timeout_s: float) -> bool:
+    """页面上是否显示了该问题的正文（确认打开的是该问题的详情页）"""
+    snippet = _question_snippet(question)
+    if not snippet:
+        return False
+    try:
+        await wait_ready(
+            page,
+            SelectorVisible(lambda p: p.get_by_text(snippet), timeout_s),
+            step="问题详情",
+        )
+        return True
+    except Exception:
+        return False
+
+
+def _answer_button(page: Page) -> Locator:
+    return page.locator("div").filter(has_text="我来回答").nth(2)
 
-    if not page.locator("div").filter(has_text="我来回答").nth(2).is_visible():
+
+async def check_had_answered(page: Page) -> bool:
+    # 等待“我来回答”按钮出现；超时说明页面上没有该按钮
+    try:
+        await wait_ready(
+            page,
+            SelectorVisible(_answer_button, config.answer_button_timeout_s),
+            step="回答页面",
+        )
+    except Exception:
+        pass
+
+    if not await _answer_button(page).is_visible():
         logger.warn("没有找到“我来回答”按钮，你可能已经回答了。")
         return True
     else:
         return False
 
 
-def click_answer_button(page2: Page) -> bool:
+async def click_answer_button(page2: Page) -> bool:
     """点击“我来回答”按钮"""
     try:
-        page2.locator("div").filter(has_text="我来回答").nth(2).click()
+        await _answer_button(page2).click()
         return True
     except Exception as e:
         logger.error(f"点击“我来回答”失败: {e}")
         return False
 
 
-def fill_answer_content(page2: Page, answer: str) -> bool:
+async def _pace() -> None:
+    """发布节奏控制：每个步骤等待 delay_time_s 的一半（可随机偏移）"""
+    if config.enabled_random_time:
+        await asyncio.sleep(get_random(config.delay_time_s) // 2)
+    else:
+        await asyncio.sleep(config.delay_time_s // 2)
+
+
+async def fill_answer_content(page2: Page, answer: str) -> bool:
     """填写回答内容"""
     try:
         textbox = page2.get_by_role("textbox", name="请输入您的回答")
-        textbox.click()
-        if(config.enabled_random_time):
-            time.sleep(get_random(config.delay_time_s) // 2)
-        else:
-            time.sleep(config.delay_time_s//2)
-        textbox.fill(answer)
+        await textbox.click()
+        await _pace()
+        await textbox.fill(answer)
         return True
     except Exception as e:
         logger.error(f"填写回答失败: {e}")
         return False
 
 
-def submit_answer(page2: Page) -> bool:
-    """提交回答并关闭页面"""
+@traced("submit_answer")
+async def submit_answer(page2: Page) -> bool:
+    """提交回答（页面由调用方关闭或复用）"""
     try:
-        page2.get_by_text("立即发布").click()
-        if(config.enabled_random_time):
-            time.sleep(get_random(config.delay_time_s) // 2)
-        else:
-            time.sleep(config.delay_time_s//2)
+        await page2.get_by_text("立即发布").click()
+        await _pace()
         logger.info("发布成功")
-        page2.close()
         return True
     except Exception as e:
         logger.error(f"提交回答失败: {e}")
-        page2.close()
         return False
 
 
-def answer(page: Page, questions: list[str]) -> None:
-    total_questions = len(questions)
-    for index, question in enumerate(questions, start=1):
-        logger.info(f"处理中：{index}/{total_questions}")
-        logger.info(f"问题{index}：{question}")
-        if not upload_answer(page, question):
-            logger.warn(f"问题{index}处理失败，跳过")
-            continue
+async def answer(
+    page: Page,
+    questions: AsyncIterable[tuple[QuestionRecord, Future | None]],
+    course_url: str | None = None,
+    session: BrowserSession | None = None,
+) -> None:
+    """逐个发布回答（串行执行，保持 delay_time_s 节奏）
+    Args:
+        page: 问题列表页面
+        questions: 问题流，元素为 (问题记录, 预取任务)；爬虫仍在加载时也可开始发布
+        course_url: 所属课程URL
+        session: 浏览器会话，每题之后检查资源占用，超限时更换回答页面或上下文
+    """
+    index = 0
+    # 整门课程复用一个回答页面，避免每题新建、销毁标签页
+    worker = None
+    if config.reuse_answer_page:
+        worker = await (session.new_page() if session else page.context.new_page())
+    try:
+        async for record, pending in questions:
+            index += 1
+            question = record["text"]
+            logger.info(f"处理中：第{index}题")
+            logger.info(f"问题{index}：{question}")
+            url = question_url(record, course_url) if worker else None
+            if not await upload_answer(page, question, pending, course_url, url, worker):
+                # 未用到的预取任务若尚未开始则直接取消
+                if pending:
+                    pending.cancel()
+                logger.warn(f"问题{index}处理失败，跳过")
+            if session:
+                worker = await session.checkpoint(worker)
+    finally:
+        if worker:
+            await worker.close()
+    logger.info(f"本课程共处理 {index} 道题目")
 
 
 if __name__ == "__main__":
@@ -150,6 +680,7 @@ if __name__ == "__main__":
     test_questions = ["你好，世界！", "今天天气如何？", "什么是人工智能？"]
 
     answers = process_questions(test_questions)
+    shutdown_prefetch()
 
     for q, a in zip(test_questions, answers):
         print(f"问题: {q}")
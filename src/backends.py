@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+
+
+class AnswerBackend(ABC):
+    """回答后端：根据问题给出回答
+
+    get_answer 按顺序尝试各个后端，第一个给出回答的后端生效。
+    子类实现 answer；remote 为 True 的后端需要网络请求，批量模式下合并请求。
+    """
+
+    name = "backend"
+    remote = False
+
+    @abstractmethod
+    def answer(self, question: str) -> str | None:
+        """返回回答；没有把握时返回 None，交给下一个后端
+        Raises:
+            Exception: 后端出错时抛出，调用方记录日志后尝试下一个后端
+        """
@@ -0,0 +1,115 @@
+import json
+import re
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+BATCH_INSTRUCTION = (
+    "下面有多个编号的问题，请按上述要求分别回答每一个问题。\n"
+    '只输出一个 JSON 对象，键为问题编号（字符串），值为对应的回答，例如 {"1": "回答", "2": "回答"}，'
+    "不要输出其他任何内容。"
+)
+
+_THINK = re.compile(r"<think>.*?</think>", re.DOTALL)
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_batch_prompt(questions: list[str]) -> str:
+    """把多个问题编号后拼成一条用户消息（编号从 1 开始）"""
+    lines = [BATCH_INSTRUCTION, ""]
+    for index, question in enumerate(questions, start=1):
+        lines.append(f"{index}. 问题：{question}")
+    return "\n".join(lines)
+
+
+def parse_batch_answers(text: str, count: int) -> dict[int, str]:
+    """解析批量回答，只保留编号有效且内容非空的条目
+    Args:
+        text: 模型输出（可能包含推理内容或代码块标记）
+        count: 本批问题数量
+    Returns:
+        dict[int, str]: 问题下标（从 0 开始） -> 回答；无法解析时返回空字典
+    """
+    text = _FENCE.sub("", _THINK.sub("", text).strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    answers = {}
+    for key, value in data.items():
+        if not str(key).strip().isdigit() or not isinstance(value, str):
+            continue
+        index = int(str(key).strip()) - 1
+        if 0 <= index < count and value.strip():
+            answers[index] = value.strip()
+    return answers
+
+
+class BatchCollector:
+    """把陆续提交的问题攒成批次
+
+    攒满 batch_size 个立即提交；不足一批时，第一个问题等待 wait_s 秒后
+    连同之后到达的问题一起提交，避免最后几个问题一直等待。
+
+    Args:
+        batch_size: 每批问题数量
+        wait_s: 不足一批时的最长等待时间（秒）
+        submit: 处理一批 (问题, Future) 的回调
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        wait_s: float,
+        submit: Callable[[list[tuple[str, Future]]], None],
+    ):
+        self.batch_size = batch_size
+        self.wait_s = wait_s
+        self._submit = submit
+        self._pending: list[tuple[str, Future]] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def add(self, question: str) -> Future:
+        """加入一个问题，返回其回答的 Future"""
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((question, future))
+            if len(self._pending) >= self.batch_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.wait_s, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._submit(batch)
+        return future
+
+    def flush(self) -> None:
+        """立即提交等待中的问题"""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._submit(batch)
+
+    def cancel(self) -> None:
+        """取消等待中的问题（程序退出时）"""
+        with self._lock:
+            batch = self._take()
+        for _, future in batch:
+            future.cancel()
+
+    def _take(self) -> list[tuple[str, Future]]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from src.logger import Logger
+
+logger = Logger()
+
+
+def normalize_question(text: str) -> str:
+    """归一化问题文本（全半角统一、合并空白、转小写），用于生成缓存键"""
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.lower()
+
+
+class AnswerCache:
+    """基于 SQLite 的本地回答缓存
+
+    - 键：归一化问题文本 + 模型 + 温度 + 提示词版本 的哈希
+    - 淘汰：超过 max_entries 时按最近访问时间淘汰（LRU）
+    - 过期：超过 ttl_s 秒的条目视为未命中并删除（ttl_s <= 0 表示永不过期）
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_s: float = 0):
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # sqlite 连接跨线程共享，需要加锁
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_last_access ON answers(last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        question: str, model: str, temperature: float, prompt_version: int
+    ) -> str:
+        raw = "\x00".join(
+            [str(prompt_version), model, f"{temperature:g}", normalize_question(question)]
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            answer, created_at = row
+            if self.ttl_s > 0 and now - created_at > self.ttl_s:
+                # 条目已过期，删除后按未命中处理
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE answers SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return answer
+
+    def set(self, key: str, answer: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, created_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, answer, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """超出容量时淘汰最久未访问的条目（调用方需持有锁）"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN"
+                " (SELECT key FROM answers ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def log_stats(self) -> None:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        logger.info(
+            f"回答缓存统计: 命中 {self.hits} 次, 未命中 {self.misses} 次, 命中率 {rate:.1f}%"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,42 +1,422 @@
+import os
+import sys
+import threading
+
 import yaml
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    ValidationError,
+    model_validator,
+)
+
 from src.logger import Logger
-import sys
+
+# 可通过环境变量指定其他配置文件（例如离线基准测试）
+CONFIG_PATH_ENV = "AUTOANSWER_CONFIG"
+
+
+class _Section(BaseModel):
+    # 允许多余字段（兼容旧配置），数字可作为字符串使用（如手机号）
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+
+class UserSection(_Section):
+    name: str | None = None
+    password: str | None = None
+
+
+class OptionSection(_Section):
+    driver: str
+    browser_path: str | None = None
+    delay_time_s: int
+    enabled_random_time: bool
+    question_classification: int = Field(ge=0, le=1)
+    # 问题爬取方式：dom=解析渲染后的页面 xhr=直接解析问题列表接口响应
+    crawl_mode: str = "dom"
+    xhr_url_pattern: str = r"(?i)question.*list|list.*question"
+    xhr_timeout_s: int = 30
+    # 增量爬取的停止条件：数量上限（0=不限）、问题最大天数（0=不限）、时间预算
+    max_questions: int = 50
+    max_question_age_days: float = 0
+    crawl_time_budget_s: float = 120
+    # 按时间排序时连续遇到多少道已回答的问题即停止（0=不限）
+    max_answered_streak: int = 10
+    # 每次滚动后等待新问题出现的时间，以及连续几次没有新问题视为到底
+    scroll_wait_s: float = 3
+    max_idle_scrolls: int = 2
+    # 同时爬取的课程页面数量
+    crawl_concurrency: int = 4
+    # 发布回答时复用同一个页面直接打开问题详情，而不是每题点击打开新标签页
+    reuse_answer_page: bool = True
+    # 问题没有详情链接时（如 xhr 模式）用于拼接链接的模板，可用 {id} 和 {course_id}
+    question_url_template: str | None = None
+
+
+class EndpointSection(_Section):
+    name: str | None = None
+    base_url: str
+    api_key: str
+    model: str
+
+
+class OpenAISection(_Section):
+    # 单个接口写在 base_url/api_key/model 中，多个接口写在 endpoints 列表中
+    base_url: str | None = None
+    api_key: str | None = None
+    model: str | None = None
+    endpoints: list[EndpointSection] | None = None
+    max_tokens: int
+    temperature: float
+    prefetch_workers: int = 4
+    # 流式输出：边接收边去除推理内容，回答完整后提前结束请求
+    stream: bool = True
+    answer_max_chars: int = 200
+    stop_at_blank_line: bool = True
+    # 正文中可能含有 <think> 推理（含省略开始标签的模型），见到 </think> 之前不提前结束
+    reasoning_in_content: bool = True
+    # 共享 HTTP 连接池
+    timeout_s: float = 60
+    max_connections: int = 10
+    keepalive_expiry_s: float = 30
+    # 批量模式：一次请求回答多个问题（1 表示关闭）
+    batch_size: int = 1
+    batch_wait_ms: int = 1500
+
+    @model_validator(mode="after")
+    def _check_endpoint(self) -> "OpenAISection":
+        if not self.endpoints and not (self.base_url and self.api_key and self.model):
+            raise ValueError("需要填写 base_url、api_key、model，或在 endpoints 中列出接口")
+        return self
+
+
+class RouterSection(_Section):
+    max_retries: int = 2
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 8
+    hedge: bool = False
+    hedge_min_samples: int = 5
+    latency_window: int = 20
+    breaker_failures: int = 3
+    breaker_cooldown_s: float = 60
+    explore_rate: float = Field(default=0.05, ge=0, le=1)
+
+
+class BrowserSection(_Section):
+    mode: str = "launch"
+    user_data_dir: str = "res/browser-profile"
+    cdp_url: str = "http://127.0.0.1:9222"
+    skip_login_check: bool = True
+    auth_cookie_names: list[str] | None = None
+    cookie_min_ttl_s: float = 600
+
+
+class WatchdogSection(_Section):
+    enabled: bool = True
+    check_every: int = 10
+    max_rss_mb: float = 2048
+    max_js_heap_mb: float = 512
+    max_pages: int = 20
+    max_questions_per_context: int = 0
+
+
+class RetrievalSection(_Section):
+    enabled: bool = False
+    corpus_dir: str = "res/corpus"
+    index_dir: str = "res/corpus_index"
+    min_confidence: float = Field(default=0.6, ge=0, le=1)
+    top_k: int = 3
+    max_chars: int = 100
+    max_segments: int = 8
+    llm_fallback: bool = True
+
+
+class CacheSection(_Section):
+    enabled: bool = True
+    path: str = "res/answer_cache.db"
+    max_entries: int = 5000
+    ttl_hours: float = 168
+
+
+class SimilarSection(_Section):
+    enabled: bool = False
+    path: str = "res/similar_questions.db"
+    threshold: float = Field(default=0.7, gt=0, le=1)
+    max_entries: int = 50000
+
+
+class RequestFilterSection(_Section):
+    enabled: bool = False
+    block_resource_types: list[str] | None = None
+    block_url_patterns: list[str] | None = None
+    allow_url_patterns: list[str] | None = None
+
+
+class WaitsSection(_Section):
+    page_timeout_s: float = 60
+    answer_button_timeout_s: float = 10
+    login_timeout_s: float = 120
+    settle_quiet_ms: int = 800
+    networkidle_fallback: bool = False
+
+
+class SpansSection(_Section):
+    enabled: bool = True
+    dir: str = "res/spans"
+
+
+class QuestionIndexSection(_Section):
+    enabled: bool = True
+    path: str = "res/question_index.db"
+
+
+class LoggingSection(_Section):
+    level: str = "INFO"
+    file_enabled: bool = True
+    dir: str = "res/logs"
+    max_bytes: int = 5 * 1024 * 1024
+    backup_count: int = 3
+    json_format: bool = Field(default=False, alias="json")
+
+
+class ConfigSchema(_Section):
+    """configs.yaml 的结构，可选配置段缺省（或为空）时使用默认值"""
+
+    user: UserSection = Field(validation_alias=AliasChoices("user", "User"))
+    option: OptionSection
+    question_urls: list[str | None] = Field(alias="question-urls")
+    openai: OpenAISection = Field(alias="OpenAI")
+    router: RouterSection | None = None
+    browser: BrowserSection | None = None
+    watchdog: WatchdogSection | None = None
+    retrieval: RetrievalSection | None = None
+    cache: CacheSection | None = None
+    similar: SimilarSection | None = None
+    request_filter: RequestFilterSection | None = None
+    waits: WaitsSection | None = None
+    spans: SpansSection | None = None
+    question_index: QuestionIndexSection | None = None
+    logging: LoggingSection | None = None
 
 
 class Config:
-    def __init__(self):
-        self.login_url = "https://passport.zhihuishu.com/login"
-        config = self.loading_config()
-        if not config:
+    """单例配置
+
+    创建实例不会读取文件，首次访问配置项时才加载并校验 configs.yaml，
+    之后所有模块共享同一份结果。
+    """
+
+    login_url = "https://passport.zhihuishu.com/login"
+
+    _instance = None
+    _lock = threading.Lock()  # 线程安全锁
+    _loaded = False
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(Config, cls).__new__(cls)
+        return cls._instance
+
+    def __getattr__(self, name: str):
+        # 只有实例上还没有该属性时才会进入这里：首次访问配置项时加载
+        if name.startswith("__") or self._loaded:
+            raise AttributeError(name)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        return object.__getattribute__(self, name)
+
+    def _load(self) -> None:
+        data = self.loading_config()
+        if not data:
             Logger().error("配置加载失败，程序无法继续运行。")
             sys.exit(1)  # 退出程序
 
         # 验证配置结构
-        self._validate_config(config)
-
-        self.username: str = str(config["user"]["name"])
-        self.password: str = str(config["user"]["password"])
-        self.driver: str = str(config["option"]["driver"])
-        self.browser_path: str | None = str(config["option"].get("browser_path", None))
-        self.delay_time_s: int = int(config["option"]["delay_time_s"])
-        self.enabled_random_time: bool = config["option"]["enabled_random_time"]
-        self.question_classification: int = int(
-            config["option"]["question_classification"]
-        )
+        config = self._validate_config(data)
+
+        self.username: str = str(config.user.name or "")
+        self.password: str = str(config.user.password or "")
+        option = config.option
+        self.driver: str = option.driver
+        self.browser_path: str | None = option.browser_path or None
+        self.delay_time_s: int = option.delay_time_s
+        self.enabled_random_time: bool = option.enabled_random_time
+        self.question_classification: int = option.question_classification
+
+        self.crawl_mode: str = option.crawl_mode.lower()
+        if self.crawl_mode not in ("dom", "xhr"):
+            raise ValueError("crawl_mode 只能是 dom 或 xhr")
+        self.xhr_url_pattern: str = option.xhr_url_pattern
+        self.xhr_timeout_s: int = option.xhr_timeout_s
+        self.max_questions: int = option.max_questions
+        self.max_question_age_days: float = option.max_question_age_days
+        self.crawl_time_budget_s: float = option.crawl_time_budget_s
+        self.max_answered_streak: int = option.max_answered_streak
+        self.scroll_wait_s: float = option.scroll_wait_s
+        self.max_idle_scrolls: int = option.max_idle_scrolls
+        self.crawl_concurrency: int = max(1, option.crawl_concurrency)
+        self.reuse_answer_page: bool = option.reuse_answer_page
+        self.question_url_template: str | None = option.question_url_template or None
 
-        self.courses: list = config["question-urls"]
+        self.courses: list = config.question_urls
+
+        # 浏览器会话配置（可选）：launch=每次启动 persistent=固定用户数据目录 cdp=连接已运行的浏览器
+        browser = config.browser or BrowserSection()
+        self.browser_mode: str = browser.mode.lower()
+        if self.browser_mode not in ("launch", "persistent", "cdp"):
+            raise ValueError("browser.mode 只能是 launch、persistent 或 cdp")
+        self.user_data_dir: str = browser.user_data_dir
+        self.cdp_url: str = browser.cdp_url
+        self.skip_login_check: bool = browser.skip_login_check
+        self.auth_cookie_names: list[str] = list(browser.auth_cookie_names or [])
+        self.cookie_min_ttl_s: float = browser.cookie_min_ttl_s
 
         # 添加 OpenAI 配置
-        self.openai_base_url: str = config["OpenAI"]["base_url"]
-        self.openai_api_key: str = config["OpenAI"]["api_key"]
-        self.openai_model: str = config["OpenAI"]["model"]
-        self.max_tokens: int = int(config["OpenAI"]["max_tokens"])
-        self.temperature: float = float(config["OpenAI"]["temperature"])
+        openai = config.openai
+        # 模型接口列表，第一个接口同时作为 openai_base_url/openai_model（回答缓存按其区分）
+        if openai.endpoints:
+            self.llm_endpoints: list[dict] = [
+                {
+                    "name": endpoint.name or endpoint.base_url,
+                    "base_url": endpoint.base_url,
+                    "api_key": endpoint.api_key,
+                    "model": endpoint.model,
+                }
+                for endpoint in openai.endpoints
+            ]
+        else:
+            self.llm_endpoints = [
+                {
+                    "name": openai.base_url,
+                    "base_url": openai.base_url,
+                    "api_key": openai.api_key,
+                    "model": openai.model,
+                }
+            ]
+        self.openai_base_url: str = self.llm_endpoints[0]["base_url"]
+        self.openai_api_key: str = self.llm_endpoints[0]["api_key"]
+        self.openai_model: str = self.llm_endpoints[0]["model"]
+        self.max_tokens: int = openai.max_tokens
+        self.temperature: float = openai.temperature
+        self.prefetch_workers: int = max(1, openai.prefetch_workers)
+        self.openai_stream: bool = openai.stream
+        self.answer_max_chars: int = max(0, openai.answer_max_chars)
+        self.stop_at_blank_line: bool = openai.stop_at_blank_line
+        self.reasoning_in_content: bool = openai.reasoning_in_content
+        self.openai_timeout_s: float = openai.timeout_s
+        self.http_max_connections: int = max(1, openai.max_connections)
+        self.http_keepalive_expiry_s: float = openai.keepalive_expiry_s
+        self.batch_size: int = max(1, openai.batch_size)
+        self.batch_wait_s: float = max(0, openai.batch_wait_ms) / 1000
+
+        # 多接口路由配置（可选）
+        router = config.router or RouterSection()
+        self.router_max_retries: int = max(0, router.max_retries)
+        self.router_backoff_base_s: float = router.backoff_base_s
+        self.router_backoff_max_s: float = router.backoff_max_s
+        self.router_hedge: bool = router.hedge
+        self.router_hedge_min_samples: int = router.hedge_min_samples
+        self.router_latency_window: int = max(1, router.latency_window)
+        self.router_breaker_failures: int = max(1, router.breaker_failures)
+        self.router_breaker_cooldown_s: float = router.breaker_cooldown_s
+        self.router_explore_rate: float = router.explore_rate
+
+        # 回答缓存配置（可选）
+        cache = config.cache or CacheSection()
+        self.cache_enabled: bool = cache.enabled
+        self.cache_path: str = cache.path
+        self.cache_max_entries: int = cache.max_entries
+        self.cache_ttl_hours: float = cache.ttl_hours
+
+        # 近似问题复用配置（可选）
+        similar = config.similar or SimilarSection()
+        self.similar_enabled: bool = similar.enabled
+        self.similar_path: str = similar.path
+        self.similar_threshold: float = similar.threshold
+        self.similar_max_entries: int = similar.max_entries
+
+        # 浏览器请求过滤配置（可选）
+        request_filter = config.request_filter or RequestFilterSection()
+        self.request_filter_enabled: bool = request_filter.enabled
+        # 未配置时使用默认类型，配置为空列表 [] 表示不按类型拦截
+        self.request_filter_block_types: list[str] = (
+            ["image", "media", "font"]
+            if request_filter.block_resource_types is None
+            else list(request_filter.block_resource_types)
+        )
+        self.request_filter_block_patterns: list[str] = list(
+            request_filter.block_url_patterns or []
+        )
+        self.request_filter_allow_patterns: list[str] = list(
+            request_filter.allow_url_patterns or []
+        )
+
+        # 页面就绪等待配置（可选）
+        waits = config.waits or WaitsSection()
+        self.page_timeout_s: float = waits.page_timeout_s
+        self.answer_button_timeout_s: float = waits.answer_button_timeout_s
+        self.login_timeout_s: float = waits.login_timeout_s
+        self.settle_quiet_ms: int = waits.settle_quiet_ms
+        self.networkidle_fallback: bool = waits.networkidle_fallback
+
+        # 计时记录配置（可选）
+        spans = config.spans or SpansSection()
+        self.spans_enabled: bool = spans.enabled
+        self.spans_dir: str = spans.dir
+
+        # 浏览器资源监控配置（可选），0 表示不检查该项
+        watchdog = config.watchdog or WatchdogSection()
+        self.watchdog_enabled: bool = watchdog.enabled
+        self.watchdog_check_every: int = max(1, watchdog.check_every)
+        self.watchdog_max_rss_mb: float = watchdog.max_rss_mb
+        self.watchdog_max_js_heap_mb: float = watchdog.max_js_heap_mb
+        self.watchdog_max_pages: int = watchdog.max_pages
+        self.watchdog_max_questions_per_context: int = watchdog.max_questions_per_context
+
+        # 本地资料检索配置（可选）
+        retrieval = config.retrieval or RetrievalSection()
+        self.retrieval_enabled: bool = retrieval.enabled
+        self.retrieval_corpus_dir: str = retrieval.corpus_dir
+        self.retrieval_index_dir: str = retrieval.index_dir
+        self.retrieval_min_confidence: float = retrieval.min_confidence
+        self.retrieval_top_k: int = max(1, retrieval.top_k)
+        self.retrieval_max_chars: int = retrieval.max_chars
+        self.retrieval_max_segments: int = max(1, retrieval.max_segments)
+        self.retrieval_llm_fallback: bool = retrieval.llm_fallback
+
+        # 问题处理状态索引配置（可选）
+        question_index = config.question_index or QuestionIndexSection()
+        self.question_index_enabled: bool = question_index.enabled
+        self.question_index_path: str = question_index.path
+
+        # 日志配置（可选），配置加载完成后才生效
+        logging_config = config.logging or LoggingSection()
+        self.log_level: str = logging_config.level.upper()
+        self.log_file_enabled: bool = logging_config.file_enabled
+        self.log_dir: str = logging_config.dir
+        self.log_max_bytes: int = logging_config.max_bytes
+        self.log_backup_count: int = logging_config.backup_count
+        self.log_json: bool = logging_config.json_format
+        Logger().configure(
+            level=self.log_level,
+            file_dir=self.log_dir if self.log_file_enabled else None,
+            max_bytes=self.log_max_bytes,
+            backup_count=self.log_backup_count,
+            structured=self.log_json,
+        )
+
+        Config._loaded = True
 
     def loading_config(self) -> dict | None:
         try:
-            with open("configs.yaml", "r", encoding="utf-8") as f:
-                data = yaml.load(f, Loader=yaml.FullLoader)
+            with open(
+                os.environ.get(CONFIG_PATH_ENV, "configs.yaml"), "r", encoding="utf-8"
+            ) as f:
+                data = yaml.safe_load(f)
                 if not data:
                     Logger().error("YAML 文件为空或格式不正确。")
                     return None
@@ -48,33 +428,27 @@ class Config:
             Logger().error(f"解析 YAML 文件时出错: {str(e)}")
         return None
 
-    def _validate_config(self, config: dict):
-        """配置验证"""
-        required_keys = ["user", "option", "question-urls", "OpenAI"]
-        for key in required_keys:
-            if key not in config:
-                raise ValueError(f"配置文件缺少必需的字段: {key}")
-
-        user_keys = ["name", "password"]
-        for key in user_keys:
-            if key not in config["user"]:
-                raise ValueError(f"用户配置缺少必需的字段: {key}")
-
-        option_keys = ["driver"]
-        for key in option_keys:
-            if key not in config["option"]:
-                raise ValueError(f"选项配置缺少必需的字段: {key}")
-
-        openai_keys = ["base_url", "api_key", "model"]
-        for key in openai_keys:
-            if key not in config["OpenAI"]:
-                raise ValueError(f"OpenAI 配置缺少必需的字段: {key}")
-
-        if not isinstance(config["question-urls"], list):
-            raise TypeError("question-urls 必须是列表类型")
-
+    def _validate_config(self, data: dict) -> ConfigSchema:
+        """按 ConfigSchema 校验配置
+        Args:
+            data: 从 YAML 读取的原始配置
+        Returns:
+            ConfigSchema: 校验并填充默认值后的配置
+        Raises:
+            ValueError: 缺少必需字段或字段类型错误时抛出
+        """
+        try:
+            config = ConfigSchema.model_validate(data)
+        except ValidationError as e:
+            errors = "\n".join(
+                f"  {'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                for err in e.errors()
+            )
+            raise ValueError(f"配置文件校验失败:\n{errors}") from None
         Logger().info("配置验证通过")
+        return config
 
 
 if __name__ == "__main__":
     config = Config()
+    print(config.openai_model)
@@ -1,51 +1,432 @@
-from playwright.sync_api import (
-    sync_playwright,
-    Page,
-)
+from __future__ import annotations
+
+import html
+import re
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, TypedDict
+
+from src.configs import Config
 from src.logger import Logger
+from src.question_index import question_hash, question_index
+from src.waits import DomSettled, ResponseArrived, SelectorVisible, goto, wait_ready
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 logger = Logger()
+config = Config()
+
+QUESTION_ITEM_SELECTOR = ".question-item"
+QUESTION_CONTENT_SELECTOR = ".question-content.ZHIHUISHU_QZMD"
+
+
+class QuestionRecord(TypedDict):
+    """爬虫解析出的单个问题"""
+
+    text: str  # 问题文本
+    id: str | None  # 问题ID（页面未提供时为空）
+    href: str | None  # 问题详情链接
+    answer_count: int | None  # 回答数
+    timestamp: str | None  # 页面上显示的发布时间（原始文本）
+
+
+# 在浏览器内一次性解析所有问题项，避免逐个元素往返驱动
+_EXTRACT_QUESTIONS_JS = """
+(items, [contentSelector, start]) => items.slice(start).map((item) => {
+    const content = item.querySelector(contentSelector);
+    if (!content) return null;
+    const text = content.innerText.trim();
+    const idHolder = item.matches("[data-question-id],[data-id]")
+        ? item
+        : item.querySelector("[data-question-id],[data-id]");
+    // 只取包住问题正文的链接或问题详情链接，不取卡片中的头像、用户等其他链接
+    const wrapper = content.closest("a[href]");
+    const link = wrapper && item.contains(wrapper)
+        ? wrapper
+        : item.querySelector("a[href*='questionDetail'],a[href*='/question/']");
+    const timeEl = item.querySelector("[class*='time'],[class*='date']");
+    // 回答数从问题正文以外的文本中匹配，避免误取正文里的数字
+    const meta = item.innerText.replace(content.innerText, "");
+    const count = meta.match(/(\\d+)\\s*(?:个)?(?:回答|人回答)/);
+    return {
+        text: text,
+        id: idHolder ? (idHolder.dataset.questionId || idHolder.dataset.id) : null,
+        href: link ? link.href : null,
+        answer_count: count ? parseInt(count[1], 10) : null,
+        timestamp: timeEl ? timeEl.innerText.trim() || null : null,
+    };
+})
+"""
 
+_HREF_ID_PATTERN = re.compile(r"(\d{4,})(?!.*\d{4,})")
 
-def crawl_popular_question(page: Page, url: str) -> list[str]:
-    """爬取热门问题
+
+async def extract_questions(page: Page, start: int = 0) -> list[QuestionRecord]:
+    """通过一次 eval_on_selector_all 调用解析当前页面的问题
+    Args:
+        page: 已加载问题列表的页面对象
+        start: 从第几个问题项开始解析（滚动加载时只解析新增部分）
+    Returns:
+        list[QuestionRecord]: 问题记录列表（顺序与页面一致）
+    Raises:
+        ValueError: 从头解析时页面中没有问题容器
+    """
+    raw_items = await page.eval_on_selector_all(
+        QUESTION_ITEM_SELECTOR, _EXTRACT_QUESTIONS_JS, [QUESTION_CONTENT_SELECTOR, start]
+    )
+    if not raw_items and start == 0:
+        raise ValueError("未检测到题目容器，请检查页面结构！")
+
+    records: list[QuestionRecord] = []
+    missing = 0
+    for item in raw_items:
+        if not item or not item["text"]:
+            missing += 1
+            continue
+        if not item["id"] and item["href"]:
+            # 页面未直接给出ID时，尝试从详情链接末尾的数字中提取
+            match = _HREF_ID_PATTERN.search(item["href"])
+            item["id"] = match.group(1) if match else None
+        records.append(item)
+    if missing:
+        logger.warn(f"{missing} 个问题项未找到问题内容容器")
+    return records
+
+
+# 接口返回的问题对象中各字段可能使用的键名（按优先级排列）
+_API_ID_KEYS = ("questionId", "qid", "id")
+_API_TEXT_KEYS = ("content", "questionContent", "title", "questionTitle")
+_API_COUNT_KEYS = ("answerNum", "answerCount", "answerNumber", "answerCnt")
+_API_TIME_KEYS = ("createTime", "publishTime", "createTimeStr", "updateTime")
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def _first_value(item: dict, keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _is_question_list(value: Any) -> bool:
+    """判断是否为问题对象列表：元素为字典，且大多带有 ID 与正文字段"""
+    if not isinstance(value, list) or not value:
+        return False
+    dicts = [v for v in value if isinstance(v, dict)]
+    if len(dicts) * 2 < len(value):
+        return False
+    matched = sum(
+        1
+        for v in dicts
+        if _first_value(v, _API_ID_KEYS) is not None
+        and _first_value(v, _API_TEXT_KEYS) is not None
+    )
+    return matched * 2 >= len(dicts)
+
+
+def _find_question_list(payload: Any, depth: int = 0) -> list[dict] | None:
+    """在接口返回的 JSON 中递归查找问题列表（广度优先，深度受限）"""
+    if depth > 6:
+        return None
+    if _is_question_list(payload):
+        return payload
+    children = (
+        payload.values()
+        if isinstance(payload, dict)
+        else payload if isinstance(payload, list) else ()
+    )
+    for child in children:
+        if _is_question_list(child):
+            return child
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_question_list(child, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+
+def _format_api_time(value: Any) -> str | None:
+    """接口时间可能是毫秒/秒时间戳或字符串，统一转为页面上的显示格式"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        seconds = float(value)
+        if seconds > 1e11:  # 毫秒时间戳
+            seconds /= 1000
+        return time.strftime("%Y-%m-%d %H:%M", time.localtime(seconds))
+    return str(value).strip() or None
+
+
+def parse_question_payload(payload: Any) -> list[QuestionRecord]:
+    """解析问题列表接口返回的 JSON
+    Args:
+        payload: 接口响应体（已反序列化）
+    Returns:
+        list[QuestionRecord]: 问题记录列表；未找到问题列表时返回空列表
+    """
+    items = _find_question_list(payload)
+    if not items:
+        return []
+
+    records: list[QuestionRecord] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        raw_text = _first_value(item, _API_TEXT_KEYS)
+        if raw_text is None:
+            continue
+        # 正文可能带有富文本标签和转义字符
+        text = html.unescape(_TAG_PATTERN.sub("", str(raw_text))).strip()
+        if not text:
+            continue
+        question_id = _first_value(item, _API_ID_KEYS)
+        count = _first_value(item, _API_COUNT_KEYS)
+        records.append(
+            {
+                "text": text,
+                "id": str(question_id) if question_id is not None else None,
+                "href": None,
+                "answer_count": int(count) if str(count).isdigit() else None,
+                "timestamp": _format_api_time(_first_value(item, _API_TIME_KEYS)),
+            }
+        )
+    return records
+
+
+async def _crawl_via_api(
+    page: Page, action: Callable[[], Awaitable[Any]]
+) -> list[QuestionRecord] | None:
+    """执行 action（导航或点击），截获问题列表接口响应并直接解析
+    Returns:
+        list[QuestionRecord] | None: 解析结果；未截获到响应或解析为空时返回 None
+    """
+    pattern = re.compile(config.xhr_url_pattern)
+    try:
+        async with page.expect_response(
+            lambda response: bool(pattern.search(response.url)) and response.ok,
+            timeout=config.xhr_timeout_s * 1000,
+        ) as response_info:
+            await action()
+        response = await response_info.value
+        questions = parse_question_payload(await response.json())
+    except Exception as e:
+        logger.warn(f"未能从接口获取问题列表，回退到页面解析: {e}")
+        return None
+    if not questions:
+        logger.warn("接口响应中未找到问题列表，回退到页面解析")
+        return None
+    return questions
+
+
+async def _open_question_list(page: Page, url: str) -> None:
+    """打开问答页面并等待问题容器出现"""
+    await wait_ready(
+        page,
+        SelectorVisible(QUESTION_ITEM_SELECTOR, config.page_timeout_s),
+        action=lambda: goto(page, url, timeout=120000, wait_until="domcontentloaded"),
+        step="问题列表",
+    )
+
+
+_RELATIVE_TIME_PATTERN = re.compile(r"(\d+)\s*(秒|分钟|小时|天|周|个月)前")
+_RELATIVE_TIME_UNITS = {
+    "秒": 1,
+    "分钟": 60,
+    "小时": 3600,
+    "天": 86400,
+    "周": 7 * 86400,
+    "个月": 30 * 86400,
+}
+
+
+def parse_question_time(text: str | None, now: float | None = None) -> float | None:
+    """把页面上的发布时间解析为时间戳，无法识别时返回 None
+    支持 "2025-03-01 10:00"、"03-01 10:00"、"刚刚"、"5分钟前"、"昨天 10:00" 等格式
+    """
+    if not text:
+        return None
+    now = time.time() if now is None else now
+    text = text.strip()
+    if text.startswith("刚刚"):
+        return now
+    match = _RELATIVE_TIME_PATTERN.search(text)
+    if match:
+        return now - int(match.group(1)) * _RELATIVE_TIME_UNITS[match.group(2)]
+    day_offset = {"昨天": 1, "前天": 2}.get(text[:2])
+    if day_offset:
+        day = time.localtime(now - day_offset * 86400)
+        text = time.strftime("%Y-%m-%d ", day) + text[2:].strip()
+    elif re.match(r"^\d{1,2}-\d{1,2}", text):
+        text = f"{time.localtime(now).tm_year}-{text}"  # 当年的问题通常省略年份
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(text.strip(), fmt))
+        except ValueError:
+            continue
+    return None
+
+
+async def _scroll_for_more(page: Page) -> int | None:
+    """滚动到列表末尾触发加载下一页
+    Returns:
+        int | None: 出现新问题项时返回滚动前的问题项数量（即新增部分的起始下标），否则返回 None
+    """
+    loaded = await page.evaluate(
+        """(selector) => {
+            const items = document.querySelectorAll(selector);
+            if (items.length) items[items.length - 1].scrollIntoView();
+            window.scrollTo(0, document.body.scrollHeight);
+            return items.length;
+        }""",
+        QUESTION_ITEM_SELECTOR,
+    )
+    try:
+        await page.wait_for_function(
+            "([selector, n]) => document.querySelectorAll(selector).length > n",
+            arg=[QUESTION_ITEM_SELECTOR, loaded],
+            timeout=config.scroll_wait_s * 1000,
+        )
+        return loaded
+    except Exception:
+        return None
+
+
+async def _stream_questions(
+    page: Page,
+    url: str,
+    first_batch: list[QuestionRecord],
+    label: str,
+    sorted_by_time: bool,
+    first_from_dom: bool,
+) -> AsyncIterator[QuestionRecord]:
+    """逐条产出问题：先产出首批结果，再滚动列表增量加载，直到满足停止条件
+
+    停止条件：达到 max_questions、超出 crawl_time_budget_s、列表没有更多问题，
+    或（按时间排序时）遇到早于 max_question_age_days 的问题。
+    问题索引中已回答的问题不产出：按时间排序时连续 max_answered_streak 道已回答即停止
+    （更早的问题也已处理过），否则计入 max_questions，重复运行时无需滚动到底。
+    """
+    deadline = time.monotonic() + config.crawl_time_budget_s
+    min_time = (
+        time.time() - config.max_question_age_days * 86400
+        if config.max_question_age_days > 0
+        else None
+    )
+    seen: set[str] = set()
+    yielded = 0
+    answered = 0  # 问题索引中已回答的问题数
+    streak = 0  # 连续遇到的已回答问题数
+    idle_scrolls = 0
+    batch = first_batch
+    from_dom = first_from_dom  # 首批来自接口时，DOM 还需要从头解析一次
+
+    while True:
+        pending = (
+            {id(record) for record in question_index.filter_pending(url, batch)}
+            if question_index
+            else None
+        )
+        for record in batch:
+            # 接口与页面解析的同一问题 ID 可能缺失或不一致，统一按问题文本去重
+            key = question_hash(record["text"])
+            if key in seen:
+                continue
+            seen.add(key)
+            if pending is not None and id(record) not in pending:
+                answered += 1
+                streak += 1
+                if sorted_by_time:
+                    if config.max_answered_streak and streak >= config.max_answered_streak:
+                        logger.info(f"连续 {streak} 道{label}题目已回答过，停止爬取")
+                        return
+                elif config.max_questions and yielded + answered >= config.max_questions:
+                    logger.info(f"前 {yielded + answered} 道{label}题目已处理，达到数量上限")
+                    return
+                continue
+            streak = 0
+            if min_time is not None:
+                published = parse_question_time(record["timestamp"])
+                if published is not None and published < min_time:
+                    if sorted_by_time:
+                        logger.info(
+                            f"已到达 {config.max_question_age_days} 天前的问题，停止爬取"
+                        )
+                        return
+                    continue
+            yield record
+            yielded += 1
+            if config.max_questions and yielded >= config.max_questions:
+                logger.info(f"已爬取 {yielded} 道{label}题目，达到数量上限")
+                return
+
+        if time.monotonic() >= deadline:
+            logger.info(
+                f"爬取时间达到上限，共发现 {len(seen) - answered} 道未处理的{label}题目"
+            )
+            return
+
+        if not from_dom:
+            # 首批来自接口时，等页面渲染出问题列表后再开始滚动
+            try:
+                await wait_ready(
+                    page,
+                    SelectorVisible(QUESTION_ITEM_SELECTOR, config.page_timeout_s),
+                    step="问题列表",
+                )
+            except Exception as e:
+                logger.warn(f"页面未渲染问题列表，停止增量爬取: {e}")
+                return
+            from_dom = True
+            start = 0
+        else:
+            start = await _scroll_for_more(page)
+            if start is None:
+                idle_scrolls += 1
+                if idle_scrolls >= config.max_idle_scrolls:
+                    logger.info(
+                        f"列表已到底，共发现 {len(seen) - answered} 道未处理的{label}题目"
+                    )
+                    return
+                batch = []
+                continue
+            idle_scrolls = 0
+        batch = await extract_questions(page, start=start)
+
+
+async def crawl_popular_question(page: Page, url: str) -> AsyncIterator[QuestionRecord]:
+    """爬取热门问题（异步生成器，边滚动加载边产出）
     Args:
         page: 已登录的页面对象
         url: 目标页面URL
-    Returns:
-        list[str]: 问题文本列表
+    Yields:
+        QuestionRecord: 尚未处理过的问题记录（已去重）
     Raises:
         多种异常: 包含超时、元素未找到等错误
     """
     try:
-        # 访问目标页面（设置2分钟超时）
-        page.goto(url, timeout=120000)
-        page.wait_for_load_state("networkidle", timeout=120000)  # 等待网络空闲
-
-        # 等待问题容器加载（最多等待60秒）
-        page.wait_for_selector(".question-item", timeout=60000)
-        questions = page.query_selector_all(".question-item")
-
-        # 问题容器检测
-        if not questions:
-            raise ValueError("未检测到题目容器，请检查页面结构！")
-
-        # 解析问题内容
-        question_texts = []
-        for question_element in questions:
-            # 定位问题内容区域
-            content_div = question_element.query_selector(
-                ".question-content.ZHIHUISHU_QZMD"
+        questions = None
+        from_dom = False
+        if config.crawl_mode == "xhr":
+            # 接口模式：导航提交后即监听问题列表接口，无需等待渲染和网络空闲
+            questions = await _crawl_via_api(
+                page, lambda: goto(page, url, timeout=120000, wait_until="commit")
             )
-            if content_div:
-                # 提取纯文本内容并去除首尾空格
-                text = content_div.inner_text().strip()
-                question_texts.append(text)
-            else:
-                logger.warning("某个问题项未找到问题内容容器")
 
-        logger.info(f"成功解析 {len(question_texts)} 道热门题目")
-        return question_texts
+        if questions is None:
+            # 访问目标页面（设置2分钟超时），问题容器出现即视为就绪
+            await _open_question_list(page, url)
+
+            # 解析问题内容
+            questions = await extract_questions(page)
+            from_dom = True
+
+        logger.info(f"首批解析 {len(questions)} 道热门题目")
+        async for record in _stream_questions(
+            page, url, questions, "热门", sorted_by_time=False, first_from_dom=from_dom
+        ):
+            yield record
 
     except TimeoutError as e:
         logger.error(f"页面加载超时: {url} - {str(e)}")
@@ -58,42 +439,63 @@ def crawl_popular_question(page: Page, url: str) -> list[str]:
         raise
 
 
-def crawl_latest_question(page: Page, url: str) -> list[str]:
+async def crawl_latest_question(page: Page, url: str) -> AsyncIterator[QuestionRecord]:
     """爬取最新问题（与热门问题逻辑相似，增加排序操作）
     Args:
         page: 已登录的页面对象
         url: 目标页面URL
-    Returns:
-        list[str]: 问题文本列表
+    Yields:
+        QuestionRecord: 尚未处理过的问题记录（已去重，按发布时间从新到旧）
     """
     try:
-        page.goto(url, timeout=120000)
-        page.wait_for_load_state("networkidle", timeout=120000)
-        page.wait_for_selector(".question-item", timeout=60000)
-
-        # 点击"最新"排序标签（核心差异点）
-        page.get_by_text("最新").click()
-        page.wait_for_load_state("networkidle")  # 等待排序后的内容加载
-        page.wait_for_selector(".question-item", timeout=60000)
-
-        # 后续解析逻辑与热门问题相同
-        questions = page.query_selector_all(".question-item")
-        if not questions:
-            raise ValueError("未检测到题目容器，请检查页面结构！")
-
-        question_texts = []
-        for question_element in questions:
-            content_div = question_element.query_selector(
-                ".question-content.ZHIHUISHU_QZMD"
+        questions = None
+        from_dom = False
+        if config.crawl_mode == "xhr":
+            # 接口模式：等到"最新"标签可点击，点击时截获排序后的问题列表接口
+            await goto(page, url, timeout=120000, wait_until="domcontentloaded")
+            await wait_ready(
+                page,
+                SelectorVisible(lambda p: p.get_by_text("最新"), config.page_timeout_s),
+                step="排序标签",
+            )
+            questions = await _crawl_via_api(page, page.get_by_text("最新").click)
+
+        if questions is None:
+            await _open_question_list(page, url)
+
+            # 点击"最新"排序标签（核心差异点）：站点在排序接口返回前保留旧的热门列表，
+            # 只等 DOM 静默可能解析到旧列表，先等排序后的问题列表接口返回
+            try:
+                await wait_ready(
+                    page,
+                    ResponseArrived(config.xhr_url_pattern, config.xhr_timeout_s),
+                    action=page.get_by_text("最新").click,
+                    step="最新排序",
+                )
+            except Exception as e:
+                logger.warn(
+                    f"未等到排序后的问题列表接口（请检查 xhr_url_pattern），可能解析到排序前的列表: {e}"
+                )
+            await wait_ready(
+                page,
+                DomSettled(config.page_timeout_s, config.settle_quiet_ms),
+                step="最新排序",
+            )
+            await wait_ready(
+                page,
+                SelectorVisible(QUESTION_ITEM_SELECTOR, config.page_timeout_s),
+                step="问题列表",
             )
-            if content_div:
-                text = content_div.inner_text().strip()
-                question_texts.append(text)
-            else:
-                logger.warning("某个问题项未找到问题内容容器")
-
-        logger.info(f"成功解析 {len(question_texts)} 道最新题目")
-        return question_texts
+
+            # 后续解析逻辑与热门问题相同
+            questions = await extract_questions(page)
+            from_dom = True
+
+        logger.info(f"首批解析 {len(questions)} 道最新题目")
+        async for record in _stream_questions(
+            page, url, questions, "最新", sorted_by_time=True, first_from_dom=from_dom
+        ):
+            yield record
 
     except TimeoutError as e:
         logger.error(f"页面加载超时: {url} - {str(e)}")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import TYPE_CHECKING
+
+from src.logger import Logger
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Route
+
+logger = Logger()
+
+DEFAULT_HAR_PATH = "res/har/session.zip"
+
+
+class HarSession:
+    """录制或回放浏览器网络流量（HAR），使同一套爬取与发布流程可以离线重复运行
+
+    - record: 正常访问网站，上下文关闭时把所有请求和响应写入 HAR
+    - replay: 请求直接由 HAR 中的响应返回，可为每个请求附加固定延迟模拟网络
+
+    路径以 .zip 结尾时响应体单独压缩保存，体积更小。
+
+    Args:
+        mode: record 或 replay
+        path: HAR 文件路径
+        latency_ms: 回放时每个请求附加的延迟（毫秒）
+        not_found: 回放时 HAR 中没有的请求：abort=直接失败（完全离线） fallback=访问网络
+    """
+
+    def __init__(
+        self, mode: str, path: str, latency_ms: float = 0, not_found: str = "abort"
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError("HAR 模式只能是 record 或 replay")
+        if mode == "replay" and not os.path.exists(path):
+            raise FileNotFoundError(f"HAR 文件不存在: {path}")
+        self.mode = mode
+        self.path = path
+        self.latency_ms = latency_ms
+        self.not_found = not_found
+        self.delayed = 0
+
+    async def install(self, context: BrowserContext) -> None:
+        """在上下文上启用录制或回放（需在请求过滤之后安装，回放时优先于请求过滤）"""
+        if self.mode == "record":
+            dir_path = os.path.dirname(self.path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+            await context.route_from_har(self.path, update=True, update_mode="minimal")
+            logger.info(f"正在录制网络流量，浏览器关闭时写入: {self.path}")
+            return
+
+        await context.route_from_har(self.path, not_found=self.not_found)
+        if self.latency_ms > 0:
+            # 后注册的路由先执行：先等待，再交给 HAR 返回响应
+            await context.route("**/*", self._delay)
+        logger.info(f"正在回放网络流量: {self.path}（每个请求延迟 {self.latency_ms:.0f} 毫秒）")
+
+    async def _delay(self, route: Route) -> None:
+        self.delayed += 1
+        await asyncio.sleep(self.latency_ms / 1000)
+        await route.fallback()
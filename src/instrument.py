@@ -0,0 +1,171 @@
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from src.configs import Config
+from src.logger import Logger
+
+logger = Logger()
+config = Config()
+
+_span_ids = itertools.count(1)
+# 当前所在的 span，用于记录父子关系（asyncio 任务会自动继承上下文）
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Span:
+    """一次计时区间，attrs 可在区间内追加（例如 token 用量）"""
+
+    def __init__(self, name: str, attrs: dict[str, Any], parent: "Span | None"):
+        self.id = next(_span_ids)
+        self.name = name
+        self.attrs = attrs
+        self.parent_id = parent.id if parent else None
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration = 0.0
+        self.error: str | None = None
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._start_perf
+
+    def to_record(self, run_id: str) -> dict[str, Any]:
+        return {
+            "run": run_id,
+            "id": self.id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "ok": self.error is None,
+            "error": self.error,
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs,
+        }
+
+
+class SpanRecorder:
+    """把 span 写入每次运行单独的 JSONL 文件，并在运行结束时汇总各阶段耗时分位数"""
+
+    def __init__(self, enabled: bool, output_dir: str):
+        self.enabled = enabled
+        self.run_id = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+        self.path = os.path.join(output_dir, f"{self.run_id}.jsonl")
+        self._durations: dict[str, list[float]] = {}
+        self._lock = threading.Lock()  # get_answer 在线程池中执行
+        self._file = None
+
+    def record(self, span: Span) -> None:
+        if not self.enabled:
+            return
+        line = json.dumps(span.to_record(self.run_id), ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._durations.setdefault(span.name, []).append(span.duration)
+
+    def summary(self) -> list[tuple[str, int, float, float, float]]:
+        """返回 (阶段, 次数, p50, p95, max)，时间单位为秒"""
+        with self._lock:
+            items = sorted(self._durations.items())
+        rows = []
+        for name, durations in items:
+            ordered = sorted(durations)
+            rows.append(
+                (
+                    name,
+                    len(ordered),
+                    _percentile(ordered, 50),
+                    _percentile(ordered, 95),
+                    ordered[-1],
+                )
+            )
+        return rows
+
+    def log_summary(self) -> None:
+        rows = self.summary()
+        if not rows:
+            return
+        lines = [f"{'阶段':<24}{'次数':>6}{'p50(s)':>10}{'p95(s)':>10}{'max(s)':>10}"]
+        for name, count, p50, p95, longest in rows:
+            lines.append(f"{name:<26}{count:>6}{p50:>10.2f}{p95:>10.2f}{longest:>10.2f}")
+        logger.info("各阶段耗时统计:\n" + "\n".join(lines))
+        logger.info(f"详细计时已写入: {self.path}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    """最近秩法计算分位数（输入需已排序）"""
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+recorder = SpanRecorder(config.spans_enabled, config.spans_dir)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """计时上下文管理器
+    Args:
+        name: 阶段名称（汇总时按名称分组）
+        **attrs: 附加属性，写入 JSONL 记录
+    Yields:
+        Span: 当前区间，退出后可读取 duration
+    """
+    current = Span(name, attrs, _current_span.get())
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        recorder.record(current)
+
+
+def current_span() -> Span | None:
+    """返回当前所在的 span，可用于追加属性"""
+    return _current_span.get()
+
+
+def traced(name: str | None = None) -> Callable:
+    """计时装饰器，同时支持普通函数和协程函数"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,8 +1,94 @@
-import time
+import atexit
+import json
+import os
+import queue
+import sys
 import threading
+import time
+
+# 日志等级数值，低于最低等级的日志在调用方直接丢弃
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40, "CRITICAL": 50}
+
+_STOP = object()  # 后台线程退出标记
+
+
+class ConsoleSink:
+    """彩色控制台输出"""
+
+    def emit(self, record: dict) -> None:
+        formatted_msg = f"[{_format_time(record['time'])}] [{record['level']}] {record['msg']}"
+        prefix = "\n" if record["line_break"] else ""
+        sys.stdout.write(f"{prefix}{record['color']}{formatted_msg}\033[0m\n")
+
+    def flush(self) -> None:
+        sys.stdout.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class RotatingFileSink:
+    """按文件大小轮转的日志文件，可选 JSON 行格式"""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int, structured: bool):
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.structured = structured
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, record: dict) -> None:
+        if self.structured:
+            line = json.dumps(
+                {
+                    "time": _format_time(record["time"]),
+                    "ts": round(record["time"], 3),
+                    "level": record["level"],
+                    "thread": record["thread"],
+                    "msg": record["msg"],
+                },
+                ensure_ascii=False,
+            )
+        else:
+            line = f"[{_format_time(record['time'])}] [{record['level']}] {record['msg']}"
+        self._file.write(line + "\n")
+        if self.max_bytes > 0 and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """autoanswer.log -> autoanswer.log.1 -> ... -> autoanswer.log.N（最旧的删除）"""
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _format_time(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
 
 
 class Logger:
+    """单例日志器
+
+    调用方只把日志记录放入队列即返回，格式化和控制台/文件输出都在后台线程完成，
+    不会因 I/O 阻塞浏览器操作或回答生成。
+    """
+
     _instance = None
     _lock = threading.Lock()  # 线程安全锁
 
@@ -14,33 +100,108 @@ class Logger:
         return cls._instance
 
     def _init(self):
-        pass  # 移除不必要的文件夹创建逻辑
+        self._min_level = LEVELS["INFO"]
+        self._sinks: list = [ConsoleSink()]
+        self._file_dir: str | None = None
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._worker, name="logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
 
-    def _get_date(self):
-        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    def configure(
+        self,
+        level: str = "INFO",
+        file_dir: str | None = None,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 3,
+        structured: bool = False,
+    ) -> None:
+        """按配置调整最低等级并添加文件输出
+        Args:
+            level: 最低输出等级（DEBUG/INFO/WARN/ERROR/CRITICAL）
+            file_dir: 日志文件目录，为空时只输出到控制台
+            max_bytes: 单个日志文件的最大字节数，超过后轮转（0 表示不轮转）
+            backup_count: 保留的历史日志文件数量
+            structured: 文件中是否使用 JSON 行格式
+        """
+        self._min_level = LEVELS.get(level.upper(), LEVELS["INFO"])
+        # 配置可能被多次加载，同一目录只添加一次文件输出
+        if file_dir and file_dir != self._file_dir:
+            self._file_dir = file_dir
+            sink = RotatingFileSink(
+                os.path.join(file_dir, "autoanswer.log"), max_bytes, backup_count, structured
+            )
+            # 由后台线程添加，避免与正在写入的线程竞争
+            self._queue.put(("add_sink", sink))
 
     def info(self, msg, line_break=False):
-        self._log("[INFO]", "\033[32m", msg, line_break)
+        self._log("INFO", "\033[32m", msg, line_break)
 
     def warn(self, msg, line_break=False):
-        self._log("[WARN]", "\033[33m", msg, line_break)
-
-    def error(self, msg, line_break=False):
-        self._log("[ERROR]", "\033[31m", msg, line_break)
+        self._log("WARN", "\033[33m", msg, line_break)
 
-    def _log(self, level, color, msg, line_break):
-        current_time = self._get_date()
-        formatted_msg = f"[{current_time}] {level} {msg}"
+    warning = warn
 
-        if line_break:
-            print(f"\n{color}{formatted_msg}\033[0m")
-        else:
-            print(f"{color}{formatted_msg}\033[0m")
+    def error(self, msg, line_break=False):
+        self._log("ERROR", "\033[31m", msg, line_break)
 
     def debug(self, msg, line_break=False):
         """添加调试日志等级"""
-        self._log("[DEBUG]", "\033[34m", msg, line_break)
+        self._log("DEBUG", "\033[34m", msg, line_break)
 
     def critical(self, msg, line_break=False):
         """添加严重错误日志等级"""
-        self._log("[CRITICAL]", "\033[31m\033[1m", msg, line_break)
+        self._log("CRITICAL", "\033[31m\033[1m", msg, line_break)
+
+    def _log(self, level, color, msg, line_break):
+        if LEVELS[level] < self._min_level:
+            return
+        self._queue.put(
+            {
+                "time": time.time(),
+                "level": level,
+                "color": color,
+                "msg": str(msg),
+                "line_break": line_break,
+                "thread": threading.current_thread().name,
+            }
+        )
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if isinstance(item, tuple):
+                command, arg = item
+                if command == "add_sink":
+                    self._sinks.append(arg)
+                elif command == "flush":
+                    for sink in self._sinks:
+                        sink.flush()
+                    arg.set()
+                continue
+            for sink in self._sinks:
+                try:
+                    sink.emit(item)
+                except Exception as e:  # 输出失败不能影响主流程
+                    sys.stderr.write(f"日志输出失败: {e}\n")
+            if self._queue.empty():
+                for sink in self._sinks:
+                    sink.flush()
+        for sink in self._sinks:
+            sink.close()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """等待队列中已有的日志全部输出"""
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """输出剩余日志并停止后台线程（程序退出时自动调用）"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5.0)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from src.configs import Config
+from src.logger import Logger
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Route
+
+logger = Logger()
+config = Config()
+
+# 各类资源的典型体积（字节），被拦截的请求没有响应体，只能据此估算节省的流量
+_ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 60_000,
+    "stylesheet": 20_000,
+    "script": 50_000,
+}
+_DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+class RequestFilter:
+    """浏览器上下文的请求过滤层
+
+    按资源类型和URL正则拦截图片、字体、媒体和统计脚本等与问答无关的请求，
+    减少页面加载和网络空闲等待时间。允许列表优先于拦截规则（例如登录验证码）。
+    """
+
+    def __init__(
+        self,
+        block_resource_types: list[str],
+        block_url_patterns: list[str],
+        allow_url_patterns: list[str],
+    ):
+        self.block_resource_types = {t.lower() for t in block_resource_types}
+        self.block_url_patterns = [re.compile(p) for p in block_url_patterns]
+        self.allow_url_patterns = [re.compile(p) for p in allow_url_patterns]
+        self.blocked_by_type: dict[str, int] = {}
+        self.bytes_saved = 0
+        self.allowed = 0
+
+    async def install(self, context: BrowserContext) -> None:
+        """在上下文上注册路由，对之后打开的所有页面生效"""
+        await context.route("**/*", self._handle)
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if any(p.search(url) for p in self.allow_url_patterns):
+            return False
+        if resource_type in self.block_resource_types:
+            return True
+        return any(p.search(url) for p in self.block_url_patterns)
+
+    async def _handle(self, route: Route) -> None:
+        request = route.request
+        resource_type = request.resource_type
+        if self.should_block(request.url, resource_type):
+            self.blocked_by_type[resource_type] = (
+                self.blocked_by_type.get(resource_type, 0) + 1
+            )
+            self.bytes_saved += _ESTIMATED_BYTES.get(
+                resource_type, _DEFAULT_ESTIMATED_BYTES
+            )
+            await route.abort("blockedbyclient")
+        else:
+            self.allowed += 1
+            # 交给后续注册的路由或正常网络处理
+            await route.fallback()
+
+    def log_stats(self) -> None:
+        blocked = sum(self.blocked_by_type.values())
+        detail = ", ".join(
+            f"{t}={n}" for t, n in sorted(self.blocked_by_type.items())
+        )
+        logger.info(
+            f"请求过滤统计: 拦截 {blocked} 个请求 ({detail or '无'}), 放行 {self.allowed} 个,"
+            f" 估计节省 {self.bytes_saved / 1024 / 1024:.1f} MB"
+        )
+
+
+request_filter: RequestFilter | None = (
+    RequestFilter(
+        config.request_filter_block_types,
+        config.request_filter_block_patterns,
+        config.request_filter_allow_patterns,
+    )
+    if config.request_filter_enabled
+    else None
+)
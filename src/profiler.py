@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator
+
+from src.logger import Logger
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+    from playwright.async_api import BrowserContext
+
+logger = Logger()
+
+_Frame = tuple[str, str, int]  # (函数名, 文件, 函数定义行号)
+
+
+class SamplingProfiler:
+    """采样式 CPU 分析器：后台线程定期读取所有线程的调用栈（sys._current_frames）
+
+    不修改被分析的代码，开销只与采样间隔有关。事件循环空闲等待浏览器时，
+    栈顶是 selector 的 select 调用，据此可以区分 Python 侧耗时与浏览器侧等待。
+    其他线程持有 GIL 时采样会推迟，因此每次采样按实际经过的时间计权。
+
+    Args:
+        interval_s: 采样间隔（秒）
+    """
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        # (线程名, 调用栈) -> 累计秒数
+        self.samples: Counter[tuple[str, tuple[_Frame, ...]]] = Counter()
+        self.sample_count = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_s):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                self.samples[names.get(ident, str(ident)), _stack(frame)] += elapsed
+            self.sample_count += 1
+
+    def folded(self) -> list[str]:
+        """flamegraph.pl / speedscope 均可读取的折叠栈格式：线程;外层;...;内层 毫秒数"""
+        lines = []
+        for (thread, stack), seconds in self.samples.most_common():
+            frames = ";".join(f"{name} ({os.path.basename(file)}:{line})" for name, file, line in stack)
+            lines.append(f"{thread};{frames} {max(1, round(seconds * 1000))}")
+        return lines
+
+    def speedscope(self, name: str) -> dict:
+        """speedscope 格式（https://www.speedscope.app），每个线程一个 profile"""
+        frame_ids: dict[_Frame, int] = {}
+        profiles: dict[str, dict] = {}
+        for (thread, stack), seconds in sorted(self.samples.items()):
+            profile = profiles.setdefault(
+                thread,
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": 0,
+                    "samples": [],
+                    "weights": [],
+                },
+            )
+            profile["samples"].append([frame_ids.setdefault(frame, len(frame_ids)) for frame in stack])
+            profile["weights"].append(seconds)
+            profile["endValue"] += seconds
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "AutoAnswer_zhihuishu",
+            "shared": {
+                "frames": [
+                    {"name": func, "file": file, "line": line} for func, file, line in frame_ids
+                ]
+            },
+            "profiles": list(profiles.values()),
+        }
+
+    def write(self, output_dir: str, name: str) -> None:
+        """写入 profile.speedscope.json 和 profile.folded"""
+        with open(os.path.join(output_dir, "profile.speedscope.json"), "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(name), f, ensure_ascii=False)
+        with open(os.path.join(output_dir, "profile.folded"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded()) + "\n")
+
+
+def _stack(frame: FrameType | None) -> tuple[_Frame, ...]:
+    """从外到内的调用栈"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        # 按函数（定义所在行）合并，同一函数内不同行的采样计入同一帧
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+@asynccontextmanager
+async def profile_course(
+    context: BrowserContext, output_dir: str, name: str, interval_s: float = 0.005
+) -> AsyncIterator[None]:
+    """分析一门课程的处理过程：CPU 采样 + Playwright trace（不截图、不保存 DOM 快照）
+    Args:
+        context: 课程所用的浏览器上下文
+        output_dir: 输出目录，写入 profile.speedscope.json、profile.folded 和 trace.zip
+        name: 分析结果的名称
+        interval_s: 采样间隔（秒）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tracing = True
+    try:
+        await context.tracing.start(title=name, screenshots=False, snapshots=False, sources=False)
+    except Exception as e:
+        tracing = False
+        logger.warn(f"无法启动 Playwright trace: {e}")
+    profiler = SamplingProfiler(interval_s)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        profiler.write(output_dir, name)
+        if tracing:
+            try:
+                await context.tracing.stop(path=os.path.join(output_dir, "trace.zip"))
+            except Exception as e:
+                logger.warn(f"保存 Playwright trace 失败: {e}")
+        logger.info(
+            f"性能分析已写入: {output_dir}（采样 {profiler.sample_count} 次，"
+            f"{profiler.duration:.1f}秒）"
+        )
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from src.cache import normalize_question
+from src.configs import Config
+from src.logger import Logger
+
+logger = Logger()
+config = Config()
+
+STATUS_ANSWERED = "answered"  # 已回答（本工具发布或检测到此前已回答）
+STATUS_FAILED = "failed"  # 处理失败，下次运行会重试
+
+# 命中这些状态的问题在爬取阶段就会被过滤掉
+DONE_STATUSES = (STATUS_ANSWERED,)
+
+
+def question_hash(question: str) -> str:
+    """问题文本归一化后的哈希，作为索引中的问题标识"""
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+class QuestionIndex:
+    """按课程记录问题处理状态的本地索引
+
+    重复运行时可直接跳过已处理过的问题，无需再打开回答页面确认。
+    """
+
+    def __init__(self, path: str):
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        self.path = path
+        # 暂停时既不过滤也不记录（录制/回放网络流量时保证每次爬取到相同的问题）
+        self.suspended = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                course_url TEXT NOT NULL,
+                question_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (course_url, question_hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def suspend(self) -> None:
+        self.suspended = True
+
+    def status(self, course_url: str, question: str) -> str | None:
+        if self.suspended:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM questions WHERE course_url = ? AND question_hash = ?",
+                (course_url, question_hash(question)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark(self, course_url: str, question: str, status: str) -> None:
+        if self.suspended:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO questions"
+                " (course_url, question_hash, status, updated_at) VALUES (?, ?, ?, ?)",
+                (course_url, question_hash(question), status, time.time()),
+            )
+            self._conn.commit()
+
+    def filter_pending(self, course_url: str, questions: list[dict]) -> list[dict]:
+        """过滤掉该课程中已回答的问题，保持原有顺序
+        Args:
+            course_url: 课程URL
+            questions: 爬虫解析出的问题记录（需包含 text 字段）
+        """
+        if self.suspended:
+            return list(questions)
+        with self._lock:
+            done = {
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT question_hash FROM questions WHERE course_url = ?"
+                    f" AND status IN ({','.join('?' * len(DONE_STATUSES))})",
+                    (course_url, *DONE_STATUSES),
+                )
+            }
+        pending = [q for q in questions if question_hash(q["text"]) not in done]
+        skipped = len(questions) - len(pending)
+        if skipped:
+            logger.info(f"问题索引：跳过 {skipped} 道已处理过的问题")
+        return pending
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+question_index: QuestionIndex | None = (
+    QuestionIndex(config.question_index_path)
+    if config.question_index_enabled
+    else None
+)
@@ -0,0 +1,517 @@
+"""本地课程资料检索：BM25 倒排索引 + 按问题抽取回答
+
+索引按段（segment）增量构建，每段由以下文件组成，加载时直接内存映射：
+    lexicon.bin   词项表，按词项哈希排序的 (hash u64, 倒排起始 u32, 文档频率 u32)
+    postings.bin  倒排表，每条为 (段内段落编号 u32, 词频 u16)
+    lengths.bin   每个段落的词项数 u32
+    offsets.bin   每个段落在 passages.txt 中的字节偏移 u64（多一项作为结尾）
+    passages.txt  段落原文（UTF-8）
+    meta.json     段落数、词项总数和段落来源文件
+manifest.json 记录各段、已删除的段落范围以及已索引文件的修改时间和大小。
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import Counter
+
+from src.backends import AnswerBackend
+from src.logger import Logger
+
+logger = Logger()
+
+CORPUS_SUFFIXES = (".txt", ".md", ".markdown", ".pdf")
+INDEX_VERSION = 1
+
+_LEXICON = struct.Struct("<QII")
+_POSTING = struct.Struct("<IH")
+# 中日韩文字按相邻两字切分，字母数字按整词切分
+_RUN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+# 问句中的疑问词、语气词和常见虚词不参与检索，避免跨词的两字组合拉低置信度
+_QUESTION_WORDS = re.compile(
+    r"请问|为什么|什么|怎么样|怎么|怎样|如何|哪些|哪个|哪里|哪儿|多少|是否|[吗呢吧呀啊的了和与及或是在有]"
+)
+_MARKDOWN_HEADING = re.compile(r"^\s{0,3}#{1,6}\s.*$", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;])|\n+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """切分词项：中文相邻两字（单字成词时保留单字）、英文与数字按词"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for run in _RUN.findall(text):
+        if run.isascii() or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_terms(query: str) -> set[str]:
+    """问题中参与检索的词项（去掉疑问词和虚词）"""
+    return set(tokenize(_QUESTION_WORDS.sub(" ", query)))
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def split_passages(text: str, max_chars: int = 300) -> list[str]:
+    """按段落切分文档，过短的段落合并，过长的段落在句末拆分（Markdown 标题不计入）"""
+    passages: list[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", _MARKDOWN_HEADING.sub("", text)):
+        paragraph = re.sub(r"\s+", " ", paragraph).strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else split_sentences(paragraph)
+        for piece in pieces:
+            if current and len(current) + len(piece) > max_chars:
+                passages.append(current)
+                current = ""
+            # 段落之间保留换行，抽取回答时按行切分句子
+            current = f"{current}\n{piece}" if current else piece
+            while len(current) > max_chars:
+                passages.append(current[:max_chars])
+                current = current[max_chars:]
+    if current:
+        passages.append(current)
+    return passages
+
+
+_pdf_warned = False
+
+
+def read_document(path: str) -> str | None:
+    """读取资料文本；PDF 需要安装 pypdf，未安装时返回 None（下次运行再尝试）"""
+    global _pdf_warned
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            if not _pdf_warned:
+                logger.warn("未安装 pypdf，跳过 PDF 资料（pip install pypdf）")
+                _pdf_warned = True
+            return None
+        try:
+            reader = PdfReader(path)
+            return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+        except Exception as e:
+            logger.warn(f"读取 PDF 失败: {path} - {e}")
+            return ""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _map(path: str):
+    """只读内存映射，空文件返回空 bytes（mmap 不能映射长度为 0 的文件）"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def write_segment(path: str, passages: list[tuple[str, str]]) -> dict:
+    """把段落写成一个索引段
+    Args:
+        path: 段目录
+        passages: (来源文件, 段落文本) 列表
+    Returns:
+        dict: 段的 meta 信息
+    """
+    os.makedirs(path, exist_ok=True)
+    postings: dict[int, list[tuple[int, int]]] = {}
+    lengths = array("I")
+    offsets = array("Q", [0])
+    sources: list[list] = []  # [来源文件, 起始段落]，同一文件的段落连续
+    with open(os.path.join(path, "passages.txt"), "wb") as f:
+        for doc, (source, text) in enumerate(passages):
+            if not sources or sources[-1][0] != source:
+                sources.append([source, doc])
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term_hash(term), []).append((doc, min(tf, 0xFFFF)))
+            data = text.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+
+    with open(os.path.join(path, "postings.bin"), "wb") as postings_file, open(
+        os.path.join(path, "lexicon.bin"), "wb"
+    ) as lexicon_file:
+        start = 0
+        for key in sorted(postings):
+            entries = postings[key]
+            lexicon_file.write(_LEXICON.pack(key, start, len(entries)))
+            postings_file.write(b"".join(_POSTING.pack(doc, tf) for doc, tf in entries))
+            start += len(entries)
+    with open(os.path.join(path, "lengths.bin"), "wb") as f:
+        lengths.tofile(f)
+    with open(os.path.join(path, "offsets.bin"), "wb") as f:
+        offsets.tofile(f)
+    meta = {"docs": len(passages), "total_len": sum(lengths), "sources": sources}
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+class Segment:
+    """内存映射的只读索引段"""
+
+    def __init__(self, path: str, deleted: list[list[int]]):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.docs: int = meta["docs"]
+        self._source_starts = [start for _, start in meta["sources"]]
+        self._source_names = [name for name, _ in meta["sources"]]
+        self._maps = {
+            name: _map(os.path.join(path, f"{name}.bin"))
+            for name in ("lexicon", "postings", "lengths", "offsets")
+        }
+        self._passages = _map(os.path.join(path, "passages.txt"))
+        self.lengths = memoryview(self._maps["lengths"]).cast("B").cast("I")
+        self.offsets = memoryview(self._maps["offsets"]).cast("B").cast("Q")
+        self.terms = len(self._maps["lexicon"]) // _LEXICON.size
+        self.deleted: set[int] = {doc for start, end in deleted for doc in range(start, end)}
+        self.total_len = meta["total_len"] - sum(self.lengths[doc] for doc in self.deleted)
+        self.live = self.docs - len(self.deleted)
+
+    def lookup(self, key: int) -> tuple[int, int] | None:
+        """二分查找词项，返回 (倒排起始, 文档频率)"""
+        lexicon = self._maps["lexicon"]
+        lo, hi = 0, self.terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, start, df = _LEXICON.unpack_from(lexicon, mid * _LEXICON.size)
+            if mid_key == key:
+                return start, df
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def postings(self, start: int, df: int):
+        begin = start * _POSTING.size
+        return _POSTING.iter_unpack(self._maps["postings"][begin : begin + df * _POSTING.size])
+
+    def passage(self, doc: int) -> str:
+        return self._passages[self.offsets[doc] : self.offsets[doc + 1]].decode("utf-8")
+
+    def source(self, doc: int) -> str:
+        return self._source_names[bisect_right(self._source_starts, doc) - 1]
+
+    def close(self) -> None:
+        self.lengths.release()
+        self.offsets.release()
+        for data in [*self._maps.values(), self._passages]:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+class CorpusIndex:
+    """课程资料的 BM25 倒排索引
+
+    新增或修改的文件写入新段，旧段中对应的段落标记为删除；
+    段数超过 max_segments 时全部重建为一段。
+
+    Args:
+        corpus_dir: 资料目录（递归读取 txt/md/pdf）
+        index_dir: 索引目录
+        max_passage_chars: 每个段落的最大字数
+        max_segments: 段数上限
+    """
+
+    def __init__(
+        self,
+        corpus_dir: str,
+        index_dir: str,
+        max_passage_chars: int = 300,
+        max_segments: int = 8,
+    ):
+        self.corpus_dir = corpus_dir
+        self.index_dir = index_dir
+        self.max_passage_chars = max_passage_chars
+        self.max_segments = max_segments
+        self.segments: list[Segment] = []
+        self.docs = 0
+        self.avg_len = 0.0
+        self._manifest_path = os.path.join(index_dir, "manifest.json")
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == INDEX_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "next_segment": 1, "segments": {}, "files": {}}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _scan(self) -> dict[str, tuple[float, int]]:
+        """资料目录中的文件：相对路径 -> (修改时间, 大小)"""
+        files = {}
+        for root, _, names in os.walk(self.corpus_dir):
+            for name in names:
+                if not name.lower().endswith(CORPUS_SUFFIXES):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                relative = os.path.relpath(path, self.corpus_dir).replace(os.sep, "/")
+                files[relative] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def update(self) -> int:
+        """增量更新索引并重新加载
+        Returns:
+            int: 本次新写入的段落数
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest = self._read_manifest()
+        files = self._scan() if os.path.isdir(self.corpus_dir) else {}
+        indexed = manifest["files"]
+        changed = sorted(
+            path
+            for path, (mtime, size) in files.items()
+            if path not in indexed or [indexed[path]["mtime"], indexed[path]["size"]] != [mtime, size]
+        )
+        removed = [path for path in indexed if path not in files]
+        if not changed and not removed:
+            self.load(manifest)
+            return 0
+
+        rebuild = len(manifest["segments"]) >= self.max_segments
+        if rebuild:
+            # 段数过多：删除全部旧段，所有文件写入同一个新段
+            for name in manifest["segments"]:
+                shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+            manifest["segments"], indexed = {}, {}
+            manifest["files"] = indexed
+            changed = sorted(files)
+        else:
+            for path in [*changed, *removed]:
+                entry = indexed.pop(path, None)
+                if entry and entry["segment"]:
+                    segment = manifest["segments"][entry["segment"]]
+                    segment["deleted"].append([entry["start"], entry["end"]])
+
+        passages: list[tuple[str, str]] = []
+        name = f"seg-{manifest['next_segment']:06d}"
+        for path in changed:
+            text = read_document(os.path.join(self.corpus_dir, path))
+            if text is None:
+                continue
+            start = len(passages)
+            passages.extend((path, passage) for passage in split_passages(text, self.max_passage_chars))
+            mtime, size = files[path]
+            indexed[path] = {
+                "mtime": mtime,
+                "size": size,
+                "segment": name if len(passages) > start else None,
+                "start": start,
+                "end": len(passages),
+            }
+        if passages:
+            write_segment(os.path.join(self.index_dir, name), passages)
+            manifest["segments"][name] = {"deleted": []}
+            manifest["next_segment"] += 1
+        # 段落已全部删除的段直接移除
+        for segment_name, segment in list(manifest["segments"].items()):
+            in_use = any(entry["segment"] == segment_name for entry in indexed.values())
+            if not in_use:
+                shutil.rmtree(os.path.join(self.index_dir, segment_name), ignore_errors=True)
+                del manifest["segments"][segment_name]
+        self._write_manifest(manifest)
+        logger.info(
+            f"资料索引已{'重建' if rebuild else '更新'}：{len(changed)} 个文件，"
+            f"新增 {len(passages)} 个段落，删除 {len(removed)} 个文件"
+        )
+        self.load(manifest)
+        return len(passages)
+
+    def load(self, manifest: dict | None = None) -> None:
+        """内存映射全部索引段"""
+        manifest = manifest or self._read_manifest()
+        self.close()
+        for name, segment in sorted(manifest["segments"].items()):
+            self.segments.append(Segment(os.path.join(self.index_dir, name), segment["deleted"]))
+        self.docs = sum(segment.live for segment in self.segments)
+        total_len = sum(segment.total_len for segment in self.segments)
+        self.avg_len = total_len / self.docs if self.docs else 0.0
+
+    def idf(self, df: int) -> float:
+        return math.log(1 + (self.docs - df + 0.5) / (df + 0.5))
+
+    def _lookup(self, term: str) -> tuple[list[tuple[int, tuple[int, int]]], int]:
+        """在各段中查找词项，返回 ([(段下标, (倒排起始, 段内文档频率))], 总文档频率)"""
+        key = term_hash(term)
+        found = [(i, hit) for i, segment in enumerate(self.segments) if (hit := segment.lookup(key))]
+        return found, sum(hit[1] for _, hit in found)
+
+    def term_weights(self, query: str) -> dict[str, float]:
+        """问题中各词项的 idf 权重"""
+        return {term: self.idf(self._lookup(term)[1]) for term in query_terms(query)}
+
+    def search(self, query: str, top_k: int = 3) -> list[tuple[float, float, str, str]]:
+        """BM25 检索
+        Args:
+            query: 问题文本
+            top_k: 返回的段落数
+        Returns:
+            list: (得分, 置信度, 段落, 来源文件)，按得分从高到低；置信度为得分与
+                平均长度段落恰好包含每个词项一次时得分之比，上限为 1
+        """
+        terms = query_terms(query)
+        if not terms or not self.docs:
+            return []
+        scores: dict[tuple[int, int], float] = {}
+        max_score = 0.0
+        for term in terms:
+            found, df = self._lookup(term)
+            idf = self.idf(df)
+            max_score += idf
+            for i, hit in found:
+                segment = self.segments[i]
+                for doc, tf in segment.postings(*hit):
+                    if doc in segment.deleted:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.lengths[doc] / self.avg_len)
+                    score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    scores[i, doc] = scores.get((i, doc), 0.0) + score
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [
+            (
+                score,
+                min(1.0, score / max_score) if max_score else 0.0,
+                self.segments[i].passage(doc),
+                self.segments[i].source(doc),
+            )
+            for (i, doc), score in best
+        ]
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+
+def extract_answer(weights: dict[str, float], passages: list[str], max_chars: int) -> str:
+    """从检索到的段落中挑选与问题最相关的句子组成回答（按原文顺序）
+    Args:
+        weights: 问题词项及其 idf 权重
+        passages: 按得分排序的段落
+        max_chars: 回答的最大字数
+    """
+    candidates = []
+    for rank, passage in enumerate(passages):
+        for position, sentence in enumerate(split_sentences(passage)):
+            tokens = set(tokenize(sentence))
+            overlap = sum(weight for term, weight in weights.items() if term in tokens)
+            if overlap:
+                # 同样相关时优先排名靠前的段落
+                candidates.append((overlap * (1 - 0.2 * rank), rank, position, sentence))
+    candidates.sort(key=lambda item: -item[0])
+    chosen, used = [], 0
+    for item in candidates:
+        # 只保留与问题相关程度接近最相关句子的句子
+        if item[0] < candidates[0][0] / 2:
+            break
+        if used and used + len(item[3]) > max_chars:
+            continue
+        chosen.append(item)
+        used += len(item[3])
+        if used >= max_chars:
+            break
+    chosen.sort(key=lambda item: (item[1], item[2]))
+    return "".join(sentence for *_, sentence in chosen)[:max_chars]
+
+
+class RetrievalBackend(AnswerBackend):
+    """离线回答：从本地课程资料中检索，置信度达到阈值时直接抽取回答
+
+    索引在第一次回答时增量更新并加载。
+
+    Args:
+        index: 资料索引
+        min_confidence: 置信度阈值（0-1），低于阈值时交给下一个后端
+        top_k: 用于组成回答的段落数
+        max_chars: 回答的最大字数
+    """
+
+    name = "retrieval"
+
+    def __init__(self, index: CorpusIndex, min_confidence: float, top_k: int, max_chars: int):
+        self.index = index
+        self.min_confidence = min_confidence
+        self.top_k = top_k
+        self.max_chars = max_chars
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_index(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                self.index.update()
+                logger.info(
+                    f"资料索引已加载：{self.index.docs} 个段落，"
+                    f"耗时 {time.perf_counter() - start:.2f}秒"
+                )
+                self._ready = True
+
+    def answer(self, question: str) -> str | None:
+        self._ensure_index()
+        hits = self.index.search(question, self.top_k)
+        if not hits or hits[0][1] < self.min_confidence:
+            return None
+        ans = extract_answer(
+            self.index.term_weights(question),
+            [passage for _, _, passage, _ in hits],
+            self.max_chars,
+        )
+        if ans:
+            logger.info(f"从资料中找到回答（置信度 {hits[0][1]:.2f}，来源 {hits[0][3]}）")
+        return ans or None
+
+    def close(self) -> None:
+        self.index.close()
+
+
+if __name__ == "__main__":
+    # 构建索引并交互式检索：python -m src.retrieval <资料目录> [索引目录]
+    import sys
+
+    corpus = sys.argv[1] if len(sys.argv) > 1 else "res/corpus"
+    index = CorpusIndex(corpus, sys.argv[2] if len(sys.argv) > 2 else "res/corpus_index")
+    index.update()
+    for line in sys.stdin:
+        for score, confidence, passage, source in index.search(line.strip()):
+            print(f"[{score:.2f} / {confidence:.2f}] {source}: {passage}")
+    index.close()
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import contextvars
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+from src.configs import Config
+from src.logger import Logger
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI
+
+logger = Logger()
+config = Config()
+
+T = TypeVar("T")
+
+_http_client: httpx.Client | None = None
+_http_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """所有模型接口共用的 httpx 客户端：连接池 + 长连接，首次请求时才创建"""
+    global _http_client
+    if _http_client is None:
+        with _http_lock:
+            if _http_client is None:
+                import httpx
+
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=config.http_max_connections,
+                        max_keepalive_connections=config.http_max_connections,
+                        keepalive_expiry=config.http_keepalive_expiry_s,
+                    ),
+                    timeout=httpx.Timeout(config.openai_timeout_s, connect=10.0),
+                )
+    return _http_client
+
+
+class NoEndpointAvailable(Exception):
+    """所有模型接口都处于熔断状态"""
+
+
+class RequestCancelled(Exception):
+    """对冲请求中另一个接口已先返回，本请求主动结束"""
+
+
+# 对冲请求各自的取消标记，在执行请求的线程上下文中设置
+_hedge_cancel: contextvars.ContextVar[threading.Event | None] = contextvars.ContextVar(
+    "hedge_cancel", default=None
+)
+
+
+def hedge_cancelled() -> bool:
+    """当前请求是否为已落败的对冲请求（流式请求据此提前断开）"""
+    cancel = _hedge_cancel.get()
+    return cancel is not None and cancel.is_set()
+
+
+class Endpoint:
+    """单个模型接口及其最近的延迟与熔断状态
+
+    Args:
+        name: 接口名称（用于日志）
+        base_url: OpenAI 兼容接口地址
+        api_key: 接口密钥
+        model: 模型名称
+        window: 延迟滑动窗口大小（最近几次成功请求）
+    """
+
+    def __init__(self, name: str, base_url: str, api_key: str, model: str, window: int):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._failures = 0
+        self._open_until = 0.0
+        self._client: OpenAI | None = None
+        self._probing = False  # 首次请求已发出、尚未返回
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    # 重试由路由器负责，关闭 SDK 自带的重试
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        http_client=get_http_client(),
+                        max_retries=0,
+                    )
+        return self._client
+
+    def latency(self) -> float | None:
+        """最近请求耗时的中位数；还没有数据时返回 None"""
+        with self._lock:
+            return statistics.median(self._latencies) if self._latencies else None
+
+    def p95(self, min_samples: int) -> float | None:
+        """最近请求耗时的 p95，样本不足时返回 None"""
+        with self._lock:
+            if len(self._latencies) < max(1, min_samples):
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def available(self, now: float) -> bool:
+        return now >= self._open_until
+
+    def start_probe(self) -> bool:
+        """还没有延迟数据且没有正在进行的首次请求时，标记开始探测并返回 True"""
+        with self._lock:
+            if self._latencies or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def cancel_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, threshold: int, cooldown_s: float) -> None:
+        """连续失败达到阈值后熔断 cooldown_s 秒；恢复后再失败一次立即重新熔断"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures < threshold:
+                return
+            self._open_until = time.monotonic() + cooldown_s
+            self._failures = threshold - 1
+        logger.warn(f"模型接口 {self.name} 连续失败，暂停使用 {cooldown_s:.0f} 秒")
+
+
+class LLMRouter:
+    """在多个模型接口之间选择最快的可用接口，并负责重试、对冲请求和熔断
+
+    Args:
+        endpoints: 候选接口
+        max_retries: 失败后的最大重试次数（每次重试优先换一个接口）
+        backoff_base_s: 指数退避的初始等待时间（秒）
+        backoff_max_s: 退避等待时间上限（秒）
+        hedge: 请求超过该接口的 p95 耗时仍未返回时，向另一个接口发送对冲请求
+        hedge_min_samples: 计算 p95 所需的最少样本数
+        breaker_failures: 连续失败多少次后熔断
+        breaker_cooldown_s: 熔断持续时间（秒）
+        explore_rate: 不选延迟最低接口、随机改用其他接口的请求比例，使各接口的延迟数据保持更新
+    """
+
+    def __init__(
+        self,
+        endpoints: list[Endpoint],
+        max_retries: int = 2,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+        hedge: bool = False,
+        hedge_min_samples: int = 5,
+        breaker_failures: int = 3,
+        breaker_cooldown_s: float = 60.0,
+        explore_rate: float = 0.05,
+    ):
+        self.endpoints = endpoints
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self.explore_rate = explore_rate
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    def choose(self, exclude: list[Endpoint] | None = None) -> Endpoint | None:
+        """选择未熔断且最近延迟最低的接口
+
+        - 还没有延迟数据的接口先发一次请求测量（同一时间只探测一次），
+          探测期间按其他接口延迟的中位数参与排序
+        - 按 explore_rate 的比例随机改用其他接口，避免早期一次慢请求让某个接口再也不被使用
+        """
+        now = time.monotonic()
+        candidates = [
+            endpoint
+            for endpoint in self.endpoints
+            if endpoint.available(now) and endpoint not in (exclude or [])
+        ]
+        latencies = {endpoint: endpoint.latency() for endpoint in candidates}
+        measured = [latency for latency in latencies.values() if latency is not None]
+        prior = statistics.median(measured) if measured else 0.0
+        for endpoint in candidates:
+            if latencies[endpoint] is None and endpoint.start_probe():
+                return endpoint
+        best = min(
+            candidates,
+            key=lambda endpoint: prior if latencies[endpoint] is None else latencies[endpoint],
+            default=None,
+        )
+        if len(candidates) > 1 and random.random() < self.explore_rate:
+            return random.choice([endpoint for endpoint in candidates if endpoint is not best])
+        return best
+
+    def call(self, request: Callable[[Endpoint], T]) -> T:
+        """在选出的接口上执行 request，失败时退避后重试
+        Args:
+            request: 接收接口、返回结果的函数，失败时抛出异常
+        Returns:
+            request 的返回值
+        Raises:
+            NoEndpointAvailable: 所有接口都已熔断
+            Exception: 重试次数用尽后抛出最后一次的异常
+        """
+        failed: list[Endpoint] = []
+        last_error: Exception | None = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self._backoff(attempt))
+            endpoint = self.choose(exclude=failed) or self.choose()
+            if endpoint is None:
+                raise NoEndpointAvailable("所有模型接口均已暂停使用") from last_error
+            try:
+                return self._call_hedged(request, endpoint)
+            except Exception as e:
+                last_error = e
+                failed.append(endpoint)
+                logger.warn(f"模型接口 {endpoint.name} 请求失败（第 {attempt + 1} 次）: {e}")
+        raise last_error
+
+    def _backoff(self, attempt: int) -> float:
+        """指数退避 + 全抖动，避免多个线程同时重试"""
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** (attempt - 1)))
+
+    def _attempt(self, request: Callable[[Endpoint], T], endpoint: Endpoint) -> T:
+        start = time.perf_counter()
+        try:
+            result = request(endpoint)
+        except Exception:
+            # 落败后主动取消的对冲请求不算接口失败
+            if hedge_cancelled():
+                endpoint.cancel_probe()
+            else:
+                endpoint.record_failure(self.breaker_failures, self.breaker_cooldown_s)
+            raise
+        endpoint.record_success(time.perf_counter() - start)
+        return result
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=config.prefetch_workers * 2, thread_name_prefix="hedge"
+                    )
+        return self._pool
+
+    def _call_hedged(self, request: Callable[[Endpoint], T], primary: Endpoint) -> T:
+        delay = primary.p95(self.hedge_min_samples) if self.hedge else None
+        backup = self.choose(exclude=[primary]) if delay is not None else None
+        if backup is None:
+            return self._attempt(request, primary)
+
+        pool = self._get_pool()
+        cancels: dict[Future, threading.Event] = {}
+
+        def submit(endpoint: Endpoint) -> None:
+            # 在其他线程中执行时保留当前的计时上下文，并附上该请求的取消标记
+            context = contextvars.copy_context()
+            cancel = threading.Event()
+            context.run(_hedge_cancel.set, cancel)
+            cancels[pool.submit(context.run, self._attempt, request, endpoint)] = cancel
+
+        submit(primary)
+        done, _ = wait(cancels, timeout=delay)
+        if not done:
+            logger.info(
+                f"模型接口 {primary.name} 超过 {delay:.1f} 秒未返回，向 {backup.name} 发送对冲请求"
+            )
+            submit(backup)
+
+        # 返回最先成功的结果，并通知另一个请求结束：流式请求随即断开，
+        # 非流式请求无法中断，最长持续到客户端超时（timeout_s）
+        error: BaseException | None = None
+        pending = set(cancels)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        cancels[other].set()
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+llm_router = LLMRouter(
+    [
+        Endpoint(
+            endpoint["name"],
+            endpoint["base_url"],
+            endpoint["api_key"],
+            endpoint["model"],
+            config.router_latency_window,
+        )
+        for endpoint in config.llm_endpoints
+    ],
+    max_retries=config.router_max_retries,
+    backoff_base_s=config.router_backoff_base_s,
+    backoff_max_s=config.router_backoff_max_s,
+    hedge=config.router_hedge,
+    hedge_min_samples=config.router_hedge_min_samples,
+    breaker_failures=config.router_breaker_failures,
+    breaker_cooldown_s=config.router_breaker_cooldown_s,
+    explore_rate=config.router_explore_rate,
+)
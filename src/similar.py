@@ -0,0 +1,212 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+
+from src.cache import normalize_question
+from src.logger import Logger
+
+logger = Logger()
+
+# 去掉标点和空白后再切分，“什么是人工智能？”与“什么是人工智能”视为相同
+_NOISE = re.compile(r"[\W_]+", re.UNICODE)
+# 疑问词和语气词中的字：两个问题只差这些字时才视为同一问题
+# （多/少、和/或、是/否、为 等会改变问题含义，不在其中）
+_FILLER_CHARS = frozenset("请问吗呢吧呀啊哦的地得了么什怎样如何哪些个里儿")
+
+
+def shingles(text: str) -> set[str]:
+    """问题文本的字符 1-gram + 2-gram 集合"""
+    text = _NOISE.sub("", normalize_question(text))
+    grams = set(text)
+    grams.update(text[i : i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def same_content(a: set[str], b: set[str]) -> bool:
+    """两个问题相差的字是否都是疑问词、语气词等虚字
+
+    只差一个实词的问题（“优点”与“缺点”、“第一章”与“第二章”）Jaccard 系数仍然很高，
+    但回答完全不同，不能复用。
+    """
+    return all(gram in _FILLER_CHARS for gram in a ^ b if len(gram) == 1)
+
+
+class SimilarQuestionIndex:
+    """已回答问题的近似重复索引（MinHash + LSH）
+
+    - 相似度：字符 1/2-gram 集合的 Jaccard 系数，达到 threshold 且相差的字都是虚字时视为同一问题
+    - 检索：MinHash 签名按 bands 分段分桶，只对同桶候选计算精确相似度
+      （各哈希函数为 crc32 异或固定掩码，纯 Python 下单次签名远小于 1 毫秒）
+    - 持久化：问题、回答和签名保存在 SQLite 中，启动时载入内存
+
+    Args:
+        path: SQLite 文件路径
+        threshold: 相似度阈值（0-1）
+        max_entries: 最多保存的问题数量，超出后删除最早的
+        prompt_version: 提示词版本，版本不同的回答不复用
+        num_perm: MinHash 哈希函数个数
+        bands: LSH 分段数（num_perm 必须能被整除）
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.7,
+        max_entries: int = 50000,
+        prompt_version: int = 1,
+        num_perm: int = 64,
+        bands: int = 16,
+    ):
+        dir_path = os.path.dirname(path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.prompt_version = prompt_version
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # 掩码由固定种子生成，保证持久化的签名在下次运行仍然可用
+        self._masks = [
+            int.from_bytes(
+                hashlib.blake2b(f"minhash-{i}".encode(), digest_size=4).digest(), "little"
+            )
+            for i in range(num_perm)
+        ]
+        self.hits = 0
+        self.lookups = 0
+        self._questions: dict[int, tuple[str, str]] = {}  # id -> (问题, 回答)
+        self._shingles: dict[int, set[str]] = {}  # 首次比较时才计算，加快载入
+        self._buckets: dict[tuple[int, bytes], list[int]] = {}
+        self._lock = threading.Lock()  # sqlite 连接跨线程共享，需要加锁
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS similar_questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                prompt_version INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._load()
+
+    def signature(self, grams: set[str]) -> array:
+        """MinHash 签名（grams 不能为空）"""
+        hashes = [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+        return array("I", [min(h ^ mask for h in hashes) for mask in self._masks])
+
+    def _band_keys(self, signature: array) -> list[tuple[int, bytes]]:
+        raw = signature.tobytes()
+        size = self.rows * signature.itemsize
+        return [(band, raw[band * size : (band + 1) * size]) for band in range(self.bands)]
+
+    def _insert(self, row_id: int, question: str, answer: str, signature: array) -> None:
+        self._questions[row_id] = (question, answer)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(row_id)
+
+    def _load(self) -> None:
+        """载入最近的 max_entries 条问题，并删除更早的记录"""
+        rows = self._conn.execute(
+            "SELECT id, question, answer, signature FROM similar_questions"
+            " WHERE prompt_version = ? ORDER BY id DESC LIMIT ?",
+            (self.prompt_version, self.max_entries),
+        ).fetchall()
+        for row_id, question, answer, blob in rows:
+            signature = array("I")
+            signature.frombytes(blob)
+            if len(signature) == self.num_perm:
+                self._insert(row_id, question, answer, signature)
+        if rows:
+            self._conn.execute(
+                "DELETE FROM similar_questions WHERE id < ? OR prompt_version != ?",
+                (rows[-1][0], self.prompt_version),
+            )
+            self._conn.commit()
+        logger.info(f"近似问题索引已载入 {len(self._questions)} 条")
+
+    def lookup(self, question: str) -> tuple[str, str, float] | None:
+        """查找最相似的已回答问题
+        Args:
+            question: 问题文本
+        Returns:
+            tuple | None: (已回答的问题, 回答, 相似度)，没有达到阈值的问题时返回 None
+        """
+        grams = shingles(question)
+        if not grams:
+            return None
+        keys = self._band_keys(self.signature(grams))
+        with self._lock:
+            self.lookups += 1
+            best = self._best_match(grams, keys)
+            if best:
+                self.hits += 1
+            return best
+
+    def _best_match(
+        self, grams: set[str], keys: list[tuple[int, bytes]]
+    ) -> tuple[str, str, float] | None:
+        """在同桶候选中找相似度最高且达到阈值的问题（调用方需持有锁）"""
+        candidates = {row_id for key in keys for row_id in self._buckets.get(key, ())}
+        best = None
+        for row_id in candidates:
+            if row_id not in self._shingles:
+                self._shingles[row_id] = shingles(self._questions[row_id][0])
+            other = self._shingles[row_id]
+            score = jaccard(grams, other)
+            if (
+                score >= self.threshold
+                and (best is None or score > best[2])
+                and same_content(grams, other)
+            ):
+                best = (*self._questions[row_id], score)
+        return best
+
+    def add(self, question: str, answer: str) -> None:
+        """记录一个已回答的问题"""
+        grams = shingles(question)
+        if not grams or not answer:
+            return
+        signature = self.signature(grams)
+        with self._lock:
+            # 已有完全相同的问题时不重复记录
+            best = self._best_match(grams, self._band_keys(signature))
+            if best and best[2] >= 1.0:
+                return
+            cursor = self._conn.execute(
+                "INSERT INTO similar_questions"
+                " (question, answer, signature, prompt_version, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (question, answer, signature.tobytes(), self.prompt_version, time.time()),
+            )
+            self._conn.commit()
+            self._insert(cursor.lastrowid, question, answer, signature)
+
+    @property
+    def size(self) -> int:
+        return len(self._questions)
+
+    def log_stats(self) -> None:
+        logger.info(
+            f"近似问题索引统计: 查询 {self.lookups} 次, 复用 {self.hits} 次, 共 {self.size} 条"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
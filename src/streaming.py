@@ -0,0 +1,104 @@
+import re
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# 句末标点，按字符预算截断时在这些位置断句
+_SENTENCE_END = "。！？!?；;\n"
+# 空行后以这些字符开头说明是下一个要点，而不是回答之后的附加内容
+_LIST_MARKER = re.compile(r"[\d一二三四五六七八九十①②③④⑤（(\-•·*]")
+# 空行结束判断前回答至少应有的字符数
+_MIN_ANSWER_CHARS = 10
+
+
+def _partial_suffix(text: str, tag: str) -> int:
+    """text 末尾与 tag 开头重合的最大长度（标签可能被拆在两个分块中）"""
+    for size in range(min(len(text), len(tag) - 1), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkFilter:
+    """增量去除流式输出中的 <think>…</think> 推理内容
+
+    每收到一个分块调用 feed()，answer 始终是目前为止的可见回答；
+    跨分块的标签会暂存在缓冲区，直到能确定是否为标签。
+    部分模型省略开始标签，在 </think> 出现之前 answer 可能仍是推理内容，
+    closed 为 True 后 answer 才确定是回答。
+    """
+
+    def __init__(self):
+        self.answer = ""
+        self.thinking_chars = 0
+        self.closed = False  # 是否已经见到 </think>
+        self._buffer = ""
+        self._in_think = False
+
+    def feed(self, chunk: str) -> None:
+        self._buffer += chunk
+        while self._buffer:
+            if self._in_think:
+                end = self._buffer.find(THINK_CLOSE)
+                if end < 0:
+                    keep = _partial_suffix(self._buffer, THINK_CLOSE)
+                    self.thinking_chars += len(self._buffer) - keep
+                    self._buffer = self._buffer[len(self._buffer) - keep :]
+                    return
+                self.thinking_chars += end
+                self._buffer = self._buffer[end + len(THINK_CLOSE) :]
+                self._in_think = False
+                self.closed = True
+                continue
+
+            start = self._buffer.find(THINK_OPEN)
+            stray = self._buffer.find(THINK_CLOSE)
+            if stray >= 0 and (start < 0 or stray < start):
+                # 部分模型省略开始标签，只输出 </think>：之前的内容都是推理
+                self.thinking_chars += len(self.answer) + stray
+                self.answer = ""
+                self._buffer = self._buffer[stray + len(THINK_CLOSE) :]
+                self.closed = True
+                continue
+            if start >= 0:
+                self.answer += self._buffer[:start]
+                self._buffer = self._buffer[start + len(THINK_OPEN) :]
+                self._in_think = True
+                continue
+            keep = max(
+                _partial_suffix(self._buffer, THINK_OPEN),
+                _partial_suffix(self._buffer, THINK_CLOSE),
+            )
+            self.answer += self._buffer[: len(self._buffer) - keep]
+            self._buffer = self._buffer[len(self._buffer) - keep :]
+            return
+
+    def finish(self) -> str:
+        """流结束后返回完整回答（未闭合的推理内容丢弃）"""
+        if not self._in_think:
+            self.answer += self._buffer
+        self._buffer = ""
+        return self.answer.strip()
+
+
+def complete_answer(text: str, max_chars: int, stop_at_blank_line: bool) -> str | None:
+    """判断流式回答是否已经完整，可以提前结束请求
+    Args:
+        text: 目前为止的可见回答
+        max_chars: 回答字符预算，达到后在最后一个句末标点处截断（0 表示不限制）
+        stop_at_blank_line: 回答之后出现空行并开始新的非要点内容时视为结束
+    Returns:
+        str | None: 已完整时返回最终回答，否则返回 None
+    """
+    text = text.strip()
+    if max_chars and len(text) >= max_chars:
+        cut = text[:max_chars]
+        end = max(cut.rfind(mark) for mark in _SENTENCE_END)
+        # 截断点太靠前时宁可保留半句，也不丢掉大部分内容
+        return (cut[: end + 1] if end >= max_chars // 2 else cut).strip()
+    if stop_at_blank_line:
+        # 分点回答的要点之间也有空行，逐个检查，直到遇到要点之后的附加内容
+        for match in re.finditer(r"\n\s*\n\s*(\S)", text):
+            if match.start() >= _MIN_ANSWER_CHARS and not _LIST_MARKER.match(match.group(1)):
+                return text[: match.start()].strip()
+    return None
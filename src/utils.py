@@ -8,7 +8,7 @@ def get_random(n: int) -> int:
     return random.randint(int(n / 2), int(n * 1.5))
 
 def load_cookies(file_path: str):
-    """加载本地Cookie文件"""
+    """加载本地Cookie文件（已过期的Cookie会被丢弃）"""
     if not os.path.exists(file_path):
         return None
     try:
@@ -18,6 +18,11 @@ def load_cookies(file_path: str):
         if not cookies or not isinstance(cookies, list) or len(cookies) == 0:
             print("Cookie文件内容为空或无效")
             return None
+        now = time.time()
+        cookies = [c for c in cookies if not 0 < c.get("expires", -1) < now]
+        if not cookies:
+            print("本地Cookie均已过期")
+            return None
         return cookies
     except json.JSONDecodeError:
         print("Cookie文件格式错误（非有效JSON）")
@@ -26,6 +31,36 @@ def load_cookies(file_path: str):
         print(f"加载Cookie失败: {e}")
         return None
 
+def session_cookies_valid(
+    cookies: list[dict] | None,
+    domain: str = "zhihuishu.com",
+    names: list[str] | None = None,
+    min_ttl_s: float = 600,
+) -> bool:
+    """根据Cookie的过期时间在本地判断登录状态是否仍然有效
+    Args:
+        cookies: Cookie列表（Playwright格式，expires为秒级时间戳，-1表示会话Cookie）
+        domain: 只检查该域名下的Cookie
+        names: 需要检查的Cookie名称，为空时检查该域名下所有带过期时间的Cookie
+        min_ttl_s: 剩余有效期少于该秒数时视为无效
+    Returns:
+        bool: 全部相关Cookie都存在且未临近过期时返回True；无法判断时返回False
+    """
+    if not cookies:
+        return False
+    now = time.time()
+    related = [c for c in cookies if domain in c.get("domain", "")]
+    if names:
+        related = [c for c in related if c.get("name") in names]
+        if {c.get("name") for c in related} != set(names):
+            return False
+    # 会话Cookie没有过期时间，无法在本地判断
+    persistent = [c for c in related if c.get("expires", -1) > 0]
+    if not persistent:
+        return False
+    return min(c["expires"] for c in persistent) - now > min_ttl_s
+
+
 def save_cookies(cookies, file_path: str):
     """保存Cookie到本地文件"""
     # 创建目录（如果不存在）
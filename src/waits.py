@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from src.configs import Config
+from src.instrument import span
+from src.logger import Logger
+
+if TYPE_CHECKING:
+    from playwright.async_api import Locator, Page
+
+logger = Logger()
+config = Config()
+
+
+class WaitStrategy(ABC):
+    """页面就绪等待策略基类
+
+    每个步骤声明自己的"就绪"条件和超时时间，而不是统一等待网络空闲。
+    子类实现 _wait；需要在触发动作之前开始监听的策略（如接口响应）可重写 wait。
+    """
+
+    name = "wait"
+
+    def __init__(self, timeout_s: float):
+        self.timeout_ms = timeout_s * 1000
+
+    async def wait(
+        self, page: Page, action: Callable[[], Awaitable[Any]] | None = None
+    ) -> None:
+        if action:
+            await action()
+        await self._wait(page)
+
+    @abstractmethod
+    async def _wait(self, page: Page) -> None:
+        """等待就绪条件满足，超时抛出异常"""
+
+    def describe(self) -> str:
+        return self.name
+
+
+class SelectorVisible(WaitStrategy):
+    """等待指定元素出现并可见"""
+
+    name = "元素可见"
+
+    def __init__(
+        self,
+        selector: str | Callable[[Page], Locator],
+        timeout_s: float,
+        state: str = "visible",
+    ):
+        super().__init__(timeout_s)
+        self.selector = selector
+        self.state = state
+
+    async def _wait(self, page: Page) -> None:
+        locator = (
+            self.selector(page) if callable(self.selector) else page.locator(self.selector)
+        )
+        await locator.first.wait_for(state=self.state, timeout=self.timeout_ms)
+
+    def describe(self) -> str:
+        target = self.selector if isinstance(self.selector, str) else "定位器"
+        return f"{self.name}({target})"
+
+
+class ResponseArrived(WaitStrategy):
+    """等待URL匹配的接口响应返回（在触发动作之前开始监听，避免错过响应）"""
+
+    name = "接口响应"
+
+    def __init__(self, url_pattern: str, timeout_s: float):
+        super().__init__(timeout_s)
+        self.pattern = re.compile(url_pattern)
+
+    def _matches(self, response) -> bool:
+        return bool(self.pattern.search(response.url))
+
+    async def wait(
+        self, page: Page, action: Callable[[], Awaitable[Any]] | None = None
+    ) -> None:
+        if not action:
+            await self._wait(page)
+            return
+        async with page.expect_response(self._matches, timeout=self.timeout_ms):
+            await action()
+
+    async def _wait(self, page: Page) -> None:
+        await page.wait_for_event("response", self._matches, timeout=self.timeout_ms)
+
+    def describe(self) -> str:
+        return f"{self.name}({self.pattern.pattern})"
+
+
+class UrlMatches(WaitStrategy):
+    """等待页面URL满足条件（例如登录后离开登录页）"""
+
+    name = "URL跳转"
+
+    def __init__(self, predicate: Callable[[str], bool], timeout_s: float):
+        super().__init__(timeout_s)
+        self.predicate = predicate
+
+    async def _wait(self, page: Page) -> None:
+        await page.wait_for_url(self.predicate, timeout=self.timeout_ms)
+
+
+# 监听 DOM 变化，quietMs 毫秒内没有新的变化即视为稳定
+_DOM_SETTLED_JS = """
+([quietMs, timeoutMs]) => new Promise((resolve, reject) => {
+    const root = document.documentElement || document;
+    let timer = setTimeout(done, quietMs);
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    const deadline = setTimeout(() => {
+        observer.disconnect();
+        clearTimeout(timer);
+        reject(new Error("DOM 未在超时时间内稳定"));
+    }, timeoutMs);
+    function done() {
+        observer.disconnect();
+        clearTimeout(deadline);
+        resolve(true);
+    }
+    observer.observe(root, {
+        childList: true, subtree: true, attributes: true, characterData: true,
+    });
+})
+"""
+
+
+class DomSettled(WaitStrategy):
+    """等待 DOM 在一段静默时间内不再变化（适合点击排序后列表重新渲染的场景）"""
+
+    name = "DOM稳定"
+
+    def __init__(self, timeout_s: float, quiet_ms: int = 500):
+        super().__init__(timeout_s)
+        self.quiet_ms = quiet_ms
+
+    async def _wait(self, page: Page) -> None:
+        deadline = time.monotonic() + self.timeout_ms / 1000
+        await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+        while True:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                raise TimeoutError(f"DOM 未在 {self.timeout_ms / 1000:.0f} 秒内稳定")
+            try:
+                await page.evaluate(_DOM_SETTLED_JS, [self.quiet_ms, remaining_ms])
+                return
+            except Exception as e:
+                # 页面发生跳转会销毁执行上下文，在剩余时间内重新监听
+                if "context was destroyed" not in str(e):
+                    raise
+
+    def describe(self) -> str:
+        return f"{self.name}({self.quiet_ms}ms)"
+
+
+class NetworkIdle(WaitStrategy):
+    """等待网络空闲（仅作为显式指定的兜底策略）"""
+
+    name = "网络空闲"
+
+    async def _wait(self, page: Page) -> None:
+        await page.wait_for_load_state("networkidle", timeout=self.timeout_ms)
+
+
+async def goto(page: Page, url: str, **kwargs: Any) -> Any:
+    """带计时的 page.goto，参数与 page.goto 相同"""
+    with span("page.goto", url=url, wait_until=kwargs.get("wait_until", "load")):
+        return await page.goto(url, **kwargs)
+
+
+async def wait_ready(
+    page: Page,
+    strategy: WaitStrategy,
+    action: Callable[[], Awaitable[Any]] | None = None,
+    step: str = "",
+) -> float:
+    """按策略等待页面就绪，并记录实际等待时间
+    Args:
+        page: 页面对象
+        strategy: 就绪判断策略
+        action: 触发页面变化的异步动作（导航、点击等），在开始监听后执行
+        step: 步骤名称，仅用于日志
+    Returns:
+        float: 实际等待的秒数
+    Raises:
+        超时等异常: 策略失败，且未启用网络空闲兜底或兜底后仍不满足条件时抛出
+    """
+    with span(f"wait.{type(strategy).__name__}", step=step) as current:
+        try:
+            await strategy.wait(page, action)
+        except Exception as e:
+            if not config.networkidle_fallback or isinstance(strategy, NetworkIdle):
+                raise
+            logger.warn(f"{step}等待{strategy.describe()}失败，回退到网络空闲: {e}")
+            current.attrs["fallback"] = "networkidle"
+            # 动作已执行，兜底策略只需等待
+            await NetworkIdle(config.page_timeout_s).wait(page)
+            # 网络空闲不代表动作已生效（例如点击没有发生），再确认一次原条件
+            try:
+                await strategy.wait(page)
+            except Exception:
+                logger.warn(f"{step}网络空闲后仍未满足{strategy.describe()}")
+                raise e
+    logger.debug(f"{step}等待{strategy.describe()}完成，耗时 {current.duration:.2f} 秒")
+    return current.duration
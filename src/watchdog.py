@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Awaitable, Callable, TypedDict
+
+from src.configs import Config
+from src.instrument import span
+from src.logger import Logger
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+logger = Logger()
+config = Config()
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class ResourceSample(TypedDict):
+    """一次浏览器资源采样"""
+
+    rss_mb: float | None  # 浏览器相关进程的常驻内存总和（无法统计时为空）
+    js_heap_mb: float | None  # 回答页面的 JS 堆占用（CDP Performance.getMetrics）
+    pages: int  # 所有上下文中打开的页面数
+
+
+def process_tree_rss_mb(root_pid: int | None = None) -> float | None:
+    """统计 root_pid 所有子孙进程的常驻内存（MB）
+
+    浏览器由 Playwright 驱动进程启动，统计结果包含驱动进程本身。
+    安装了 psutil 时使用 psutil（支持 Windows 和 macOS），否则读取 Linux 的 /proc；
+    都不可用时返回 None。
+    """
+    root_pid = os.getpid() if root_pid is None else root_pid
+    try:
+        import psutil
+    except ImportError:
+        return _proc_tree_rss_mb(root_pid)
+    try:
+        children = psutil.Process(root_pid).children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for child in children:
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue  # 进程已退出或无权访问
+    return total / 1024 / 1024
+
+
+def _proc_tree_rss_mb(root_pid: int) -> float | None:
+    """通过 /proc 统计进程树的常驻内存（MB），非 Linux 系统返回 None"""
+    if not os.path.isdir("/proc"):
+        return None
+    children: dict[int, list[int]] = {}
+    rss_pages: dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r", encoding="utf-8") as f:
+                stat = f.read()
+        except OSError:
+            continue  # 进程已退出
+        # 进程名可能包含空格和括号，从最后一个 ")" 之后开始解析
+        fields = stat[stat.rfind(")") + 2 :].split()
+        pid = int(entry)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss_pages[pid] = int(fields[21])
+
+    total = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total * _PAGE_SIZE / 1024 / 1024
+
+
+async def js_heap_mb(page: Page) -> float | None:
+    """通过 CDP 读取页面的 JS 堆占用（MB），非 Chromium 浏览器返回 None"""
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            await cdp.send("Performance.enable")
+            result = await cdp.send("Performance.getMetrics")
+        finally:
+            await cdp.detach()
+    except Exception:
+        return None
+    metrics = {metric["name"]: metric["value"] for metric in result.get("metrics", [])}
+    used = metrics.get("JSHeapUsedSize")
+    return used / 1024 / 1024 if used is not None else None
+
+
+class BrowserSession:
+    """持有当前使用的浏览器上下文，并在处理问题的间隙监控浏览器资源
+
+    - 回答页面 JS 堆超限：关闭并重新打开回答页面
+    - 进程内存、页面数或单个上下文处理的问题数超限：新建上下文（重新安装反检测脚本、
+      请求过滤和 Cookie），之后打开的页面都使用新上下文；旧上下文在其页面全部关闭后释放
+
+    Args:
+        browser: 浏览器实例（为 None 时不新建上下文，只能重建页面，如 persistent 模式）
+        context: 初始上下文
+        prepare: 初始化新上下文的函数（安装请求过滤、反检测脚本和本地Cookie）
+        owns_context: 初始上下文是否由本程序创建（cdp 模式复用的上下文不会被关闭）
+        track_rss: 浏览器是否为本程序的子进程（cdp 模式连接的浏览器无法统计进程内存）
+    """
+
+    def __init__(
+        self,
+        browser: Browser | None,
+        context: BrowserContext,
+        prepare: Callable[[BrowserContext], Awaitable[None]],
+        owns_context: bool = True,
+        track_rss: bool = True,
+    ):
+        self.browser = browser
+        self.context = context
+        self.prepare = prepare
+        self.recycles = 0
+        self._external = None if owns_context else context
+        self._retiring: list[BrowserContext] = []
+        self._questions = 0  # 当前上下文处理过的问题数
+        self._since_check = 0
+        self._warned_no_recycle = False
+        self.track_rss = track_rss and process_tree_rss_mb() is not None
+        if config.watchdog_enabled and config.watchdog_max_rss_mb and not self.track_rss:
+            reason = (
+                "连接的是外部浏览器" if not track_rss else "未安装 psutil（pip install psutil）"
+            )
+            logger.warn(f"无法统计浏览器进程内存（{reason}），max_rss_mb 不生效")
+
+    async def new_page(self) -> Page:
+        """在当前上下文中打开新页面"""
+        return await self.context.new_page()
+
+    async def checkpoint(self, worker: Page | None) -> Page | None:
+        """每处理完一道题调用一次，按 check_every 采样并在超限时回收资源
+        Args:
+            worker: 当前的回答页面
+        Returns:
+            Page | None: 继续使用的回答页面（可能是新打开的）
+        """
+        self._questions += 1
+        await self._release_retired()
+        if not config.watchdog_enabled:
+            return worker
+        self._since_check += 1
+        if self._since_check < config.watchdog_check_every:
+            return worker
+        self._since_check = 0
+
+        sample = await self.sample(worker)
+        reason = self._context_limit(sample)
+        if reason:
+            return await self.recycle(reason, sample, worker)
+        if (
+            worker
+            and config.watchdog_max_js_heap_mb
+            and sample["js_heap_mb"] is not None
+            and sample["js_heap_mb"] > config.watchdog_max_js_heap_mb
+        ):
+            with span("browser_recycle", scope="page", **sample):
+                await worker.close()
+                worker = await self.new_page()
+            logger.warn(
+                f"回答页面 JS 堆 {sample['js_heap_mb']:.0f}MB 超过上限，已重新打开回答页面"
+            )
+        return worker
+
+    async def sample(self, worker: Page | None = None) -> ResourceSample:
+        """采样当前的浏览器资源占用"""
+        contexts = [self.context, *self._retiring]
+        return {
+            "rss_mb": process_tree_rss_mb() if self.track_rss else None,
+            "js_heap_mb": await js_heap_mb(worker) if worker else None,
+            "pages": sum(len(context.pages) for context in contexts),
+        }
+
+    def _context_limit(self, sample: ResourceSample) -> str | None:
+        """返回需要更换上下文的原因，未超限时返回 None"""
+        if (
+            config.watchdog_max_rss_mb
+            and sample["rss_mb"] is not None
+            and sample["rss_mb"] > config.watchdog_max_rss_mb
+        ):
+            return f"浏览器进程内存 {sample['rss_mb']:.0f}MB"
+        if config.watchdog_max_pages and sample["pages"] > config.watchdog_max_pages:
+            return f"打开的页面数 {sample['pages']}"
+        if (
+            config.watchdog_max_questions_per_context
+            and self._questions >= config.watchdog_max_questions_per_context
+        ):
+            return f"上下文已处理 {self._questions} 道题"
+        return None
+
+    async def recycle(
+        self, reason: str, sample: ResourceSample, worker: Page | None = None
+    ) -> Page | None:
+        """换用新的上下文，回答页面随之迁移到新上下文"""
+        if self.browser is None:
+            if not self._warned_no_recycle:
+                logger.warn(
+                    f"浏览器资源超限（{reason}），当前模式不能新建上下文，只重新打开回答页面"
+                )
+                self._warned_no_recycle = True
+            if worker:
+                await worker.close()
+                worker = await self.new_page()
+            return worker
+
+        with span("browser_recycle", scope="context", reason=reason, **sample):
+            old = self.context
+            context = await self.browser.new_context()
+            await self.prepare(context)
+            # 沿用当前的登录状态，而不只是本地保存的Cookie
+            await context.add_cookies(await old.cookies())
+            self.context = context
+            self._retiring.append(old)
+            self._questions = 0
+            self.recycles += 1
+            if worker:
+                await worker.close()
+                worker = await self.new_page()
+            await self._release_retired()
+        logger.warn(f"浏览器资源超限（{reason}），已更换浏览器上下文（第 {self.recycles} 次）")
+        return worker
+
+    async def _release_retired(self) -> None:
+        """关闭页面已全部关闭的旧上下文"""
+        for context in list(self._retiring):
+            if not context.pages:
+                self._retiring.remove(context)
+                await self._close_context(context)
+
+    async def _close_context(self, context: BrowserContext) -> None:
+        if context is not self._external:
+            await context.close()
+
+    async def close(self) -> None:
+        """关闭本程序创建的所有上下文"""
+        for context in [*self._retiring, self.context]:
+            await self._close_context(context)
+        self._retiring.clear()
@@ -0,0 +1,35 @@
+"""测试使用临时配置：关闭缓存与索引，日志和计时文件写入临时目录，不在工作区生成 res/"""
+
+import os
+import shutil
+import tempfile
+
+import yaml
+
+from src.configs import CONFIG_PATH_ENV
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_work_dir = tempfile.mkdtemp(prefix="autoanswer-tests-")
+
+
+def _write_config() -> str:
+    with open(os.path.join(_ROOT, "configs.yaml"), "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    data["cache"] = {"enabled": False}
+    data["question_index"] = {"enabled": False}
+    data["similar"] = {"enabled": False}
+    data["retrieval"] = {"enabled": False}
+    data["spans"] = {"enabled": False, "dir": os.path.join(_work_dir, "spans")}
+    data["logging"] = {**(data.get("logging") or {}), "file_enabled": False}
+    path = os.path.join(_work_dir, "configs.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    return path
+
+
+# 配置在首次使用时加载，必须在导入其他项目模块之前设置
+os.environ[CONFIG_PATH_ENV] = _write_config()
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_work_dir, ignore_errors=True)
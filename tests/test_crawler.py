@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import time
+
+import src.crawler as crawler
+from src.crawler import parse_question_payload
+from src.question_index import STATUS_ANSWERED, QuestionIndex
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "question_list.json"
+)
+
+
+def load_fixture() -> dict:
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_parse_fixture_field_mapping():
+    records = parse_question_payload(load_fixture())
+    assert [r["id"] for r in records] == ["1000001", "1000002", "1000003"]
+    assert records[0]["text"] == "什么是人工智能？它和机器学习有什么区别？"
+    # 富文本标签去除、转义字符还原
+    assert records[1]["text"] == "这门课的期末考试是开卷吗&需要带计算器吗？"
+    assert [r["answer_count"] for r in records] == [12, 0, 5]
+    # 毫秒时间戳转为页面显示格式，字符串时间原样保留
+    assert records[0]["timestamp"] == time.strftime(
+        "%Y-%m-%d %H:%M", time.localtime(1740794400)
+    )
+    assert records[2]["timestamp"] == "2025-03-03 09:30"
+    assert all(r["href"] is None for r in records)
+
+
+def test_parse_nested_list():
+    payload = {"code": 0, "data": {"page": {"list": load_fixture()["rt"]["questionInfoList"]}}}
+    records = parse_question_payload(payload)
+    assert len(records) == 3
+    assert records[2]["text"] == "大家觉得第三章哪个知识点最难理解？"
+
+
+def test_parse_missing_id():
+    payload = load_fixture()
+    del payload["rt"]["questionInfoList"][1]["questionId"]
+    records = parse_question_payload(payload)
+    assert [r["id"] for r in records] == ["1000001", None, "1000003"]
+
+
+def test_parse_without_question_list():
+    assert parse_question_payload({"status": "200", "rt": {"totalCount": 0}}) == []
+    assert parse_question_payload({"rt": [{"userId": 1}, {"userId": 2}]}) == []
+
+
+COURSE_URL = "https://example.com/course/1"
+
+
+def crawl_first_batch(records: list[dict]) -> list[dict]:
+    """只产出首批问题（爬取时间上限为 0，不滚动页面）"""
+
+    async def collect() -> list[dict]:
+        stream = crawler._stream_questions(None, COURSE_URL, records, "", False, True)
+        return [record async for record in stream]
+
+    return asyncio.run(collect())
+
+
+def test_recorded_course_replays_same_questions(tmp_path, monkeypatch):
+    index = QuestionIndex(str(tmp_path / "question_index.db"))
+    monkeypatch.setattr(crawler, "question_index", index)
+    monkeypatch.setattr(crawler.config, "crawl_time_budget_s", 0)
+    records = parse_question_payload(load_fixture())
+
+    # 录制：爬取并回答全部问题
+    index.suspend()
+    recorded = crawl_first_batch(records)
+    for record in recorded:
+        index.mark(COURSE_URL, record["text"], STATUS_ANSWERED)
+    # 回放：同一份流量得到相同的问题
+    replayed = crawl_first_batch(records)
+    assert len(replayed) == len(recorded) == 3
+
+    # 正常运行时已回答的问题会被跳过
+    index.suspended = False
+    for record in recorded:
+        index.mark(COURSE_URL, record["text"], STATUS_ANSWERED)
+    assert crawl_first_batch(records) == []
+    index.close()
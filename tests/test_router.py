@@ -0,0 +1,26 @@
+import random
+
+from src.router import Endpoint, LLMRouter
+
+
+def endpoints(*names: str) -> list[Endpoint]:
+    return [Endpoint(name, "http://127.0.0.1", "key", "model", 20) for name in names]
+
+
+def test_each_untried_endpoint_probed_once():
+    router = LLMRouter(endpoints("a", "b", "c"), explore_rate=0)
+    first = router.endpoints[0]
+    first.record_success(0.5)
+    chosen = {router.choose().name, router.choose().name}
+    assert chosen == {"b", "c"}
+
+
+def test_explore_samples_non_best_endpoint():
+    random.seed(0)
+    router = LLMRouter(endpoints("slow", "fast"), explore_rate=0.1)
+    slow, fast = router.endpoints
+    slow.record_success(5.0)
+    fast.record_success(0.5)
+    picks = [router.choose().name for _ in range(2000)]
+    assert 100 < picks.count("slow") < 300
+    assert picks.count("fast") > picks.count("slow")
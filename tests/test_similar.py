@@ -0,0 +1,47 @@
+import pytest
+
+from src.similar import SimilarQuestionIndex, jaccard, same_content, shingles
+
+# 字面上高度相似、但回答不能互相复用的问题
+NEAR_OPPOSITE = [
+    ("人工智能有哪些优点？", "人工智能有哪些缺点？"),
+    ("第一章的主要内容是什么", "第二章的主要内容是什么"),
+    ("大学生应该如何培养自己的学习能力？", "大学生应该如何培养自己的沟通能力？"),
+    ("线性表的顺序存储有什么特点", "线性表的链式存储有什么特点"),
+    ("中国的人口多吗", "中国的人口少吗"),
+    ("实验报告需要手写和打印吗", "实验报告需要手写或打印吗"),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarQuestionIndex(str(tmp_path / "similar.db"), threshold=0.6)
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize("answered, asked", NEAR_OPPOSITE)
+def test_near_opposite_questions_not_reused(index, answered, asked):
+    assert not same_content(shingles(answered), shingles(asked))
+    index.add(answered, "回答")
+    # 阈值放宽到 0.6 时 Jaccard 系数已达标，仍因相差实词而拒绝
+    assert jaccard(shingles(answered), shingles(asked)) >= index.threshold
+    assert index.lookup(asked) is None
+
+
+def test_filler_only_difference_reused(index):
+    index.add("什么是人工智能？", "人工智能是研究模拟人类智能的学科。")
+    match = index.lookup("什么是人工智能呢")
+    assert match is not None
+    assert match[1] == "人工智能是研究模拟人类智能的学科。"
+
+
+def test_reordered_question_reused_at_default_threshold(tmp_path):
+    index = SimilarQuestionIndex(str(tmp_path / "similar.db"))
+    try:
+        index.add("什么是人工智能？", "人工智能是研究模拟人类智能的学科。")
+        match = index.lookup("人工智能是什么")
+        assert match is not None
+        assert match[0] == "什么是人工智能？"
+    finally:
+        index.close()
@@ -0,0 +1,36 @@
+from src.streaming import ThinkFilter, complete_answer
+
+
+def feed_all(text: str, size: int) -> ThinkFilter:
+    think = ThinkFilter()
+    for i in range(0, len(text), size):
+        think.feed(text[i : i + size])
+    return think
+
+
+def test_think_block_removed_across_chunks():
+    think = feed_all("<think>先想一想。</think>\n回答内容", 3)
+    assert think.closed
+    assert think.finish() == "回答内容"
+
+
+def test_missing_open_tag_not_settled_before_close():
+    reasoning = "用户在问人工智能，我应该简单回答。\n\n再想想有没有遗漏。"
+    think = feed_all(reasoning, 4)
+    # </think> 到达之前看起来像完整的回答，但还不能确定
+    assert not think.closed
+    assert complete_answer(think.answer, 200, True) is not None
+    think.feed("</think>\n人工智能是研究模拟人类智能的学科。")
+    assert think.closed
+    assert think.finish() == "人工智能是研究模拟人类智能的学科。"
+
+
+def test_complete_answer_cuts_at_sentence_end():
+    text = "第一句话说完了。第二句话还没有说完"
+    assert complete_answer(text, 12, False) == "第一句话说完了。"
+    assert complete_answer("短回答", 200, True) is None
+
+
+def test_blank_line_between_points_does_not_hide_trailing_filler():
+    text = "1. 第一点说明。\n\n2. 第二点说明。\n\n希望对你有帮助"
+    assert complete_answer(text, 200, True) == "1. 第一点说明。\n\n2. 第二点说明。"